@@ -1,134 +1,463 @@
 import sqlite3
 import os
+import json
+import itertools
+import threading
+import uuid
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
+import migrations
+
+
+# 默认性能参数，在每个连接打开时应用
+# 注意：数据库文件放在网络共享目录时 WAL 不可用，应在配置中改为 DELETE
+DEFAULT_PROFILE = {
+    "busy_timeout": 5000,  # 等待其他连接释放锁的毫秒数
+    "journal_mode": "WAL",  # 读写互不阻塞
+    "synchronous": "NORMAL",  # WAL 模式下 NORMAL 即可保证数据库不损坏
+    "cache_size": -65536,  # 负数表示 KiB，即 64MB 页缓存
+    "mmap_size": 268435456,  # 256MB 内存映射读取
+    "temp_store": "MEMORY",  # 临时表和排序使用内存
+}
+
+# 允许配置的参数及取值校验
+_PROFILE_VALIDATORS = {
+    "busy_timeout": int,
+    "journal_mode": lambda v: _choice(v, ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")),
+    "synchronous": lambda v: _choice(v, ("OFF", "NORMAL", "FULL", "EXTRA")),
+    "cache_size": int,
+    "mmap_size": int,
+    "temp_store": lambda v: _choice(v, ("DEFAULT", "FILE", "MEMORY")),
+}
+
+# PRAGMA 查询返回数字的参数，诊断时转换为名称
+_PRAGMA_NAMES = {
+    "synchronous": ("OFF", "NORMAL", "FULL", "EXTRA"),
+    "temp_store": ("DEFAULT", "FILE", "MEMORY"),
+}
+
+# 配置文件路径可通过环境变量 ASSET_DB_CONFIG 指定
+CONFIG_ENV = "ASSET_DB_CONFIG"
+DEFAULT_CONFIG_PATH = os.path.join("data", "db_config.json")
+# 单个参数可通过环境变量覆盖，例如 ASSET_DB_SYNCHRONOUS=FULL
+PRAGMA_ENV_PREFIX = "ASSET_DB_"
+
+
+def _choice(value, choices):
+    value = str(value).upper()
+    if value not in choices:
+        raise ValueError(f"可选值为 {', '.join(choices)}")
+    return value
+
+
+def load_profile():
+    """读取性能参数：默认值 < 配置文件 < 环境变量"""
+    profile = dict(DEFAULT_PROFILE)
+    overrides = {}
+
+    config_path = os.environ.get(CONFIG_ENV, DEFAULT_CONFIG_PATH)
+    if os.path.exists(config_path):
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                overrides.update(json.load(f))
+        except Exception as e:
+            print(f"读取数据库配置文件错误: {e}")
+
+    for name in _PROFILE_VALIDATORS:
+        value = os.environ.get(PRAGMA_ENV_PREFIX + name.upper())
+        if value is not None:
+            overrides[name] = value
+
+    for name, value in overrides.items():
+        validator = _PROFILE_VALIDATORS.get(name)
+        if validator is None:
+            print(f"忽略未知的数据库参数: {name}")
+            continue
+        try:
+            profile[name] = validator(value)
+        except (TypeError, ValueError) as e:
+            print(f"忽略无效的数据库参数 {name}={value}: {e}")
+    return profile
+
+
+def apply_profile(conn, profile):
+    """在连接上应用性能参数"""
+    for name, value in profile.items():
+        try:
+            conn.execute(f"PRAGMA {name} = {value}")
+        except sqlite3.Error as e:
+            print(f"设置数据库参数 {name} 错误: {e}")
+
+
+class _ThreadGuard:
+    """保存在线程局部数据中：线程结束（线程局部数据被清除）时随之释放，用于发现未释放的连接"""
+
+
+class ConnectionManager:
+    """进程级共享连接管理器
+
+    每个线程持有一个独立的 sqlite3 连接，首次使用时打开并在之后复用，
+    所有 Database 对象共享同一个管理器，因此创建模型对象不会产生任何 I/O。
+    数据库结构迁移只在进程内第一次打开连接时检查一次。
+    线程结束前应调用 release()；没有释放的连接在线程局部数据被清除时关闭，并计为泄漏。
+    （Qt 线程池的工作线程每执行完一个任务就清除线程局部数据，任务应在结束时释放连接。）
+    """
+
+    def __init__(self, db_path, profile=None):
+        self.db_path = db_path
+        self.profile = profile if profile is not None else load_profile()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}  # 连接序号 -> (线程对象, 连接)
+        self._keys = itertools.count(1)
+        self._schema_ready = False
+        # 本程序实例的标识：本进程各连接写入的资产变更日志都标记为该值
+        # （见 migrations.install_origin_trigger）
+        self.origin = uuid.uuid4().hex
+        self._opened = 0
+        self._closed = 0
+        self._leaked = 0
+
+    def connection(self):
+        """获取当前线程的连接，不存在时创建"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+        return conn
+
+    def _open(self):
+        """为当前线程打开新连接"""
+        thread = threading.current_thread()
+        # 允许由管理器在其他线程中关闭连接，连接本身只在所属线程中使用
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # 自动提交模式，多语句事务由 Database.transaction() 显式管理
+        conn.isolation_level = None
+        # 启用外键约束
+        conn.execute("PRAGMA foreign_keys = ON")
+        apply_profile(conn, self.profile)
+
+        key = next(self._keys)
+        with self._lock:
+            self._connections[key] = (thread, conn)
+            self._opened += 1
+            if not self._schema_ready:
+                migrations.migrate(conn)
+                self._schema_ready = True
+        migrations.install_origin_trigger(conn, self.origin)
+
+        self._local.conn = conn
+        self._local.key = key
+        self._local.guard = _ThreadGuard()
+        finalizer = weakref.finalize(self._local.guard, self._thread_ended, key)
+        finalizer.atexit = False
+        self._local.depth = 0
+        self._local.commit_callbacks = []
+        return conn
+
+    def transaction_depth(self):
+        """当前线程的事务嵌套层数，0 表示不在事务中"""
+        return getattr(self._local, "depth", 0)
+
+    def _set_transaction_depth(self, depth):
+        self._local.depth = depth
+
+    def add_commit_callback(self, callback):
+        """登记当前线程事务提交后要调用的函数（同一函数只登记一次）"""
+        callbacks = self._local.commit_callbacks
+        if callback not in callbacks:
+            callbacks.append(callback)
+
+    def _pop_commit_callbacks(self):
+        callbacks = getattr(self._local, "commit_callbacks", [])
+        self._local.commit_callbacks = []
+        return callbacks
+
+    def _close_connection(self, conn):
+        try:
+            conn.close()
+        except Exception as e:
+            print(f"关闭数据库连接错误: {e}")
+        self._closed += 1
+
+    def release(self):
+        """关闭当前线程的连接（线程或线程池任务结束前调用）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            self._connections.pop(self._local.key, None)
+            self._close_connection(conn)
+
+    def _thread_ended(self, key):
+        """线程局部数据被清除时调用：连接仍未释放则关闭，并计为泄漏"""
+        with self._lock:
+            entry = self._connections.pop(key, None)
+            if entry is None:
+                return
+            self._leaked += 1
+            self._close_connection(entry[1])
+
+    def close_all(self):
+        """关闭所有线程的连接（程序退出时调用）"""
+        with self._lock:
+            for _, conn in self._connections.values():
+                self._close_connection(conn)
+            self._connections.clear()
+        self._local = threading.local()
+
+    def stats(self):
+        """连接统计：已打开、已关闭、活动及泄漏（所属线程结束时仍未释放，由管理器关闭）的连接数"""
+        with self._lock:
+            return {
+                "db_path": self.db_path,
+                "opened": self._opened,
+                "closed": self._closed,
+                "active": len(self._connections),
+                "leaked": self._leaked,
+            }
+
+    def diagnostics(self):
+        """报告当前线程连接上实际生效的参数（与配置值可能不同，如文件系统不支持 WAL）"""
+        conn = self.connection()
+        report = {"sqlite_version": sqlite3.sqlite_version}
+        for name in list(_PROFILE_VALIDATORS) + ["foreign_keys"]:
+            value = conn.execute(f"PRAGMA {name}").fetchone()
+            value = value[0] if value else None
+            if name in _PRAGMA_NAMES and isinstance(value, int):
+                value = _PRAGMA_NAMES[name][value]
+            report[name] = value
+        report["user_version"] = migrations.current_version(conn)
+        report["configured"] = dict(self.profile)
+        report["connections"] = self.stats()
+        return report
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(db_name="assets.db"):
+    """获取指定数据库文件的共享连接管理器"""
+    with _managers_lock:
+        manager = _managers.get(db_name)
+        if manager is None:
+            # 确保data目录存在
+            if not os.path.exists("data"):
+                os.makedirs("data")
+            manager = ConnectionManager(os.path.join("data", db_name))
+            _managers[db_name] = manager
+        return manager
+
+
+def init_database(db_name="assets.db"):
+    """程序启动时调用：打开连接并执行未应用的结构迁移，返回当前结构版本"""
+    conn = get_manager(db_name).connection()
+    return migrations.current_version(conn)
+
+
+def close_all_connections():
+    """关闭所有管理器的全部连接"""
+    with _managers_lock:
+        managers = list(_managers.values())
+    for manager in managers:
+        manager.close_all()
+
 
 class Database:
+    """数据库访问对象
+
+    本身不持有连接，所有操作使用共享管理器中当前线程的连接，
+    因此可以随意创建，开销可忽略。
+    """
+
     def __init__(self, db_name="assets.db"):
-        # 确保data目录存在
-        if not os.path.exists("data"):
-            os.makedirs("data")
-        
-        self.db_path = os.path.join("data", db_name)
-        self.conn = None
-        self.cursor = None
-        self.connect()
-        self.create_tables()
-    
+        self.manager = get_manager(db_name)
+        self.db_path = self.manager.db_path
+        self.cursor = None  # 最近一次执行使用的游标（用于读取 lastrowid）
+
+    @property
+    def conn(self):
+        """当前线程的共享连接"""
+        return self.manager.connection()
+
     def connect(self):
         """连接到数据库"""
         try:
-            self.conn = sqlite3.connect(self.db_path)
-            self.cursor = self.conn.cursor()
-            # 启用外键约束
-            self.cursor.execute("PRAGMA foreign_keys = ON")
+            self.manager.connection()
             return True
         except Exception as e:
             print(f"数据库连接错误: {e}")
             return False
-    
-    def create_tables(self):
-        """创建数据库表"""
-        # 用户表
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL DEFAULT 'user',  -- admin 或 user
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # 资产表
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS assets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            asset_id TEXT UNIQUE NOT NULL,  -- 资产编号
-            name TEXT NOT NULL,  -- 设备名称
-            quantity INTEGER NOT NULL DEFAULT 1,  -- 数量
-            category TEXT NOT NULL,  -- 类目
-            brand_spec TEXT,  -- 品牌规格
-            purchase_date DATE,  -- 入库时间
-            image_path TEXT,  -- 资产图片路径
-            location TEXT,  -- 设备位置
-            notes TEXT,  -- 备注
-            maintenance_status TEXT DEFAULT '正常',  -- 维修状态
-            created_by INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (created_by) REFERENCES users(id)
-        )
-        ''')
-        
-        # 资产使用人表
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS asset_users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            asset_id INTEGER NOT NULL,
-            user_name TEXT NOT NULL,  -- 使用人姓名
-            start_date DATE NOT NULL,  -- 开始使用时间
-            end_date DATE,  -- 结束使用时间
-            FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE
-        )
-        ''')
-        
-        # 维修记录表
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS repair_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            asset_id INTEGER NOT NULL,
-            repair_date DATE NOT NULL,  -- 维修时间
-            fault_cause TEXT,  -- 故障原因
-            repair_result TEXT,  -- 维修结果
-            created_by INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE,
-            FOREIGN KEY (created_by) REFERENCES users(id)
-        )
-        ''')
-        
-        # 添加默认管理员用户
-        self.cursor.execute("SELECT * FROM users WHERE username = 'admin'")
-        if not self.cursor.fetchone():
-            self.cursor.execute(
-                "INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
-                ('admin', 'admin123', 'admin')
-            )
-        
-        self.conn.commit()
-    
+
+    @property
+    def in_transaction(self):
+        """当前线程是否处于 transaction() 中"""
+        return self.manager.transaction_depth() > 0
+
+    @contextmanager
+    def transaction(self, savepoint=True, deferred=False):
+        """事务上下文管理器
+
+        最外层使用 BEGIN IMMEDIATE ... COMMIT，嵌套调用使用 SAVEPOINT，
+        因此模型方法可以在调用方的事务中执行，整个操作只提交一次。
+        代码块抛出异常时回滚本层并重新抛出异常。
+
+        savepoint=False 时嵌套调用直接加入外层事务，不单独回滚（异常交给外层处理）。
+        批量写入应使用这种方式：在保存点内执行大量会触发触发器的语句，耗时随行数平方增长。
+        deferred=True 时最外层使用 BEGIN DEFERRED，不预先获取写锁（见 read_transaction）。
+        """
+        conn = self.conn
+        depth = self.manager.transaction_depth()
+        if depth > 0 and not savepoint:
+            yield self
+            return
+        savepoint = f"sp_{depth}"
+        if depth == 0:
+            conn.execute("BEGIN DEFERRED" if deferred else "BEGIN IMMEDIATE")
+        else:
+            conn.execute(f"SAVEPOINT {savepoint}")
+        self.manager._set_transaction_depth(depth + 1)
+        try:
+            yield self
+        except BaseException:
+            self.manager._set_transaction_depth(depth)
+            if depth == 0:
+                conn.rollback()
+                self.manager._pop_commit_callbacks()
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            raise
+        self.manager._set_transaction_depth(depth)
+        try:
+            if depth == 0:
+                conn.commit()
+            else:
+                conn.execute(f"RELEASE {savepoint}")
+        except Exception:
+            if depth == 0:
+                conn.rollback()
+                self.manager._pop_commit_callbacks()
+            raise
+        if depth == 0:
+            self._run_commit_callbacks()
+
+    def read_transaction(self):
+        """只读事务：代码块中的所有查询读取同一个快照，看不到其他连接在此期间提交的修改
+
+        用于多次查询且结果必须彼此一致的长时间读取（如导出）。快照在第一次查询时确定；
+        已在事务中时直接加入外层事务。DELETE 日志模式下读取期间其他连接无法提交写入。
+        """
+        return self.transaction(savepoint=False, deferred=True)
+
+    def after_commit(self, callback):
+        """事务提交后调用 callback：不在事务中时立即调用，事务回滚时不调用"""
+        if self.in_transaction:
+            self.manager.add_commit_callback(callback)
+        else:
+            callback()
+
+    def _run_commit_callbacks(self):
+        for callback in self.manager._pop_commit_callbacks():
+            try:
+                callback()
+            except Exception as e:
+                print(f"提交回调错误: {e}")
+
     def execute(self, query, params=()):
-        """执行SQL语句"""
+        """执行SQL语句（不在事务中时立即提交）"""
+        conn = self.conn
         try:
+            self.cursor = conn.cursor()
             self.cursor.execute(query, params)
-            self.conn.commit()
             return True
         except Exception as e:
             print(f"SQL执行错误: {e}")
-            self.conn.rollback()
+            # 事务中失败的语句由 SQLite 自动撤销，是否回滚整个事务由调用方决定
+            if not self.in_transaction and conn.in_transaction:
+                conn.rollback()
             return False
-    
+
+    def executemany(self, query, rows):
+        """批量执行SQL语句，所有行在同一个事务中提交
+
+        返回 (成功行数, 错误列表)，错误列表元素为 (行序号, 错误信息)。
+        某一行出错时只撤销该行（SQLite 语句级回滚），记录错误后从下一行继续批量执行，
+        其余行照常写入；语句本身无法执行时所有行都记为出错。
+        在调用方的事务中执行时不再嵌套保存点（见 transaction）。
+        """
+        rows = list(rows)
+        if self.manager.transaction_depth() == 0:
+            with self.transaction():
+                return self.executemany(query, rows)
+
+        errors = []
+        position = [0]  # 下一行的序号
+
+        def remaining():
+            while position[0] < len(rows):
+                index = position[0]
+                position[0] += 1
+                yield rows[index]
+
+        self.cursor = self.conn.cursor()
+        while position[0] < len(rows):
+            start = position[0]
+            try:
+                self.cursor.executemany(query, remaining())
+            except sqlite3.Error as e:
+                if position[0] == start:
+                    # 还没有取出任何一行就出错（如语句无法编译），其余各行都无法执行
+                    errors.extend((index, str(e)) for index in range(start, len(rows)))
+                    break
+                # 出错的是最后取出的一行
+                errors.append((position[0] - 1, str(e)))
+        return len(rows) - len(errors), errors
+
     def fetchall(self, query, params=()):
         """获取所有查询结果"""
         try:
+            self.cursor = self.conn.cursor()
             self.cursor.execute(query, params)
             return self.cursor.fetchall()
         except Exception as e:
             print(f"查询错误: {e}")
             return []
-    
+
+    def iterate(self, query, params=(), batch_size=1000):
+        """逐批读取查询结果，内存占用只与批大小有关
+
+        与 fetchall 不同，查询出错时抛出异常，避免调用方把部分结果当作完整结果。
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+
     def fetchone(self, query, params=()):
         """获取单个查询结果"""
         try:
+            self.cursor = self.conn.cursor()
             self.cursor.execute(query, params)
-            return self.cursor.fetchone()
+            row = self.cursor.fetchone()
+            # 结束语句：未读完的游标会让共享连接一直停留在同一个读快照上，看不到其他连接的提交
+            self.cursor.close()
+            return row
         except Exception as e:
             print(f"查询错误: {e}")
             return None
-    
+
     def close(self):
-        """关闭数据库连接"""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
-            self.cursor = None
+        """释放游标（共享连接由连接管理器统一关闭）"""
+        self.cursor = None
+
+
+if __name__ == "__main__":
+    # 输出数据库参数诊断信息：python database.py
+    for key, value in get_manager().diagnostics().items():
+        print(f"{key}: {value}")
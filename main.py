@@ -7,12 +7,17 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from ui.login import LoginDialog
 from ui.main_window import MainWindow
+from ui.db_executor import shutdown_executor
+from database import init_database, close_all_connections
 
 def main():
     # 创建应用实例
     app = QApplication(sys.argv)
     app.setApplicationName("资产管理系统")
     
+    # 启动时执行一次数据库结构迁移
+    init_database()
+    
     while True:  # 使用循环支持登出后重新登录
         # 显示登录对话框
         login_dialog = LoginDialog()
@@ -23,7 +28,9 @@ def main():
             # 等待主窗口关闭
             app.exec_()
         else:
-            # 登录取消，退出程序
+            # 登录取消，停止后台任务、关闭数据库连接并退出程序
+            shutdown_executor()
+            close_all_connections()
             sys.exit(0)
 
 if __name__ == "__main__":
@@ -0,0 +1,326 @@
+"""数据库结构迁移
+
+每个迁移步骤有一个递增的版本号，已应用的版本记录在 PRAGMA user_version 中。
+程序启动时只执行尚未应用的步骤；结构已是最新时只读取一次 user_version。
+新增索引或字段时，在文件末尾用 @migration 注册新的步骤即可，不要修改已发布的步骤。
+"""
+
+import sqlite3
+
+MIGRATIONS = []  # (版本号, 说明, 函数)
+
+
+def migration(version, description):
+    """注册迁移步骤的装饰器，函数接收一个游标"""
+    def decorator(func):
+        if MIGRATIONS and version <= MIGRATIONS[-1][0]:
+            raise ValueError(f"迁移版本号必须递增: {version}")
+        MIGRATIONS.append((version, description, func))
+        return func
+    return decorator
+
+
+def latest_version():
+    """最新的结构版本号"""
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def current_version(conn):
+    """数据库当前的结构版本号"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """执行所有未应用的迁移步骤，返回执行的步骤数"""
+    # 快速路径：结构已是最新
+    if current_version(conn) >= latest_version():
+        return 0
+
+    applied = 0
+    for version, description, func in MIGRATIONS:
+        # 每个步骤单独一个事务；BEGIN IMMEDIATE 防止多个进程同时迁移
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 取得写锁后重新检查，其他进程可能已经完成了该步骤
+            if current_version(conn) >= version:
+                conn.rollback()
+                continue
+            func(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+            applied += 1
+        except Exception as e:
+            conn.rollback()
+            print(f"数据库迁移错误 (版本 {version}: {description}): {e}")
+            raise
+    return applied
+
+
+@migration(1, "初始表结构及默认管理员")
+def _initial_schema(cursor):
+    # 用户表
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL DEFAULT 'user',  -- admin 或 user
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # 资产表
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS assets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        asset_id TEXT UNIQUE NOT NULL,  -- 资产编号
+        name TEXT NOT NULL,  -- 设备名称
+        quantity INTEGER NOT NULL DEFAULT 1,  -- 数量
+        category TEXT NOT NULL,  -- 类目
+        brand_spec TEXT,  -- 品牌规格
+        purchase_date DATE,  -- 入库时间
+        image_path TEXT,  -- 资产图片路径
+        location TEXT,  -- 设备位置
+        notes TEXT,  -- 备注
+        maintenance_status TEXT DEFAULT '正常',  -- 维修状态
+        created_by INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (created_by) REFERENCES users(id)
+    )
+    ''')
+
+    # 资产使用人表
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS asset_users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        asset_id INTEGER NOT NULL,
+        user_name TEXT NOT NULL,  -- 使用人姓名
+        start_date DATE NOT NULL,  -- 开始使用时间
+        end_date DATE,  -- 结束使用时间
+        FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE
+    )
+    ''')
+
+    # 维修记录表
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS repair_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        asset_id INTEGER NOT NULL,
+        repair_date DATE NOT NULL,  -- 维修时间
+        fault_cause TEXT,  -- 故障原因
+        repair_result TEXT,  -- 维修结果
+        created_by INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE,
+        FOREIGN KEY (created_by) REFERENCES users(id)
+    )
+    ''')
+
+    # 添加默认管理员用户
+    cursor.execute("SELECT id FROM users WHERE username = 'admin'")
+    if not cursor.fetchone():
+        cursor.execute(
+            "INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
+            ('admin', 'admin123', 'admin')
+        )
+
+
+@migration(2, "常用查询的二级索引")
+def _lookup_indexes(cursor):
+    # 使用人记录按资产查询
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_asset_users_asset ON asset_users(asset_id)"
+    )
+    # 当前使用人（未结束使用）查询
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_asset_users_current "
+        "ON asset_users(asset_id) WHERE end_date IS NULL"
+    )
+    # 维修记录按资产查询并按维修时间排序
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_repair_records_asset_date "
+        "ON repair_records(asset_id, repair_date)"
+    )
+    # 主窗口按类目、维修状态筛选
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_assets_category ON assets(category)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_assets_status ON assets(maintenance_status)"
+    )
+
+
+@migration(3, "资产全文检索索引（FTS5 trigram）")
+def _asset_fulltext(cursor):
+    # 外部内容表：只保存索引，不复制资产数据；trigram 分词支持中文任意子串匹配
+    try:
+        cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS assets_fts USING fts5(
+            asset_id, name, brand_spec, location, notes,
+            content='assets', content_rowid='id', tokenize='trigram'
+        )
+        ''')
+    except sqlite3.OperationalError as e:
+        # SQLite 版本过低（需要 3.34 以上并启用 FTS5）时搜索退回 LIKE 匹配
+        print(f"全文检索不可用，搜索将使用 LIKE 匹配: {e}")
+        return
+
+    # 触发器保持索引与资产表同步
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS assets_fts_insert AFTER INSERT ON assets BEGIN
+        INSERT INTO assets_fts (rowid, asset_id, name, brand_spec, location, notes)
+        VALUES (new.id, new.asset_id, new.name, new.brand_spec, new.location, new.notes);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS assets_fts_delete AFTER DELETE ON assets BEGIN
+        INSERT INTO assets_fts (assets_fts, rowid, asset_id, name, brand_spec, location, notes)
+        VALUES ('delete', old.id, old.asset_id, old.name, old.brand_spec, old.location, old.notes);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS assets_fts_update
+    AFTER UPDATE OF asset_id, name, brand_spec, location, notes ON assets BEGIN
+        INSERT INTO assets_fts (assets_fts, rowid, asset_id, name, brand_spec, location, notes)
+        VALUES ('delete', old.id, old.asset_id, old.name, old.brand_spec, old.location, old.notes);
+        INSERT INTO assets_fts (rowid, asset_id, name, brand_spec, location, notes)
+        VALUES (new.id, new.asset_id, new.name, new.brand_spec, new.location, new.notes);
+    END
+    ''')
+    # 为已有资产建立索引
+    cursor.execute("INSERT INTO assets_fts (assets_fts) VALUES ('rebuild')")
+
+
+@migration(4, "资产变更时自动更新 updated_at（供增量刷新使用）")
+def _touch_updated_at(cursor):
+    # 资产的任何修改都更新 updated_at（语句本身已设置 updated_at 时不再重复）
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS assets_touch_update
+    AFTER UPDATE ON assets WHEN new.updated_at IS old.updated_at BEGIN
+        UPDATE assets SET updated_at = CURRENT_TIMESTAMP WHERE id = new.id;
+    END
+    ''')
+    # 使用人变化会改变资产列表中的当前使用人
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS asset_users_touch_insert AFTER INSERT ON asset_users BEGIN
+        UPDATE assets SET updated_at = CURRENT_TIMESTAMP WHERE id = new.asset_id;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS asset_users_touch_update AFTER UPDATE ON asset_users BEGIN
+        UPDATE assets SET updated_at = CURRENT_TIMESTAMP WHERE id IN (old.asset_id, new.asset_id);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS asset_users_touch_delete AFTER DELETE ON asset_users BEGIN
+        UPDATE assets SET updated_at = CURRENT_TIMESTAMP WHERE id = old.asset_id;
+    END
+    ''')
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_assets_updated_at ON assets(updated_at)"
+    )
+
+
+@migration(5, "统一数量和入库时间的存储格式，为可排序的列建立索引")
+def _sortable_columns(cursor):
+    # 表格按数量和入库时间排序时直接比较列值：数量统一存为整数，
+    # 入库时间统一为 YYYY-MM-DD（早期导入的数据可能带有时间部分）
+    # 只转换能无损转为整数的数量（纯数字文本、整数值的小数），其余保持原值并列出，由用户更正
+    cursor.execute('''
+    UPDATE assets SET quantity = CAST(trim(quantity) AS INTEGER)
+    WHERE (typeof(quantity) = 'text' AND trim(quantity) GLOB '[0-9]*'
+           AND trim(quantity) NOT GLOB '*[^0-9]*')
+       OR (typeof(quantity) = 'real' AND quantity = CAST(quantity AS INTEGER))
+    ''')
+    invalid = cursor.execute(
+        "SELECT asset_id, quantity FROM assets WHERE typeof(quantity) NOT IN ('integer', 'null')"
+    ).fetchall()
+    if invalid:
+        print(f"以下 {len(invalid)} 个资产的数量不是整数，未修改，请手动更正: "
+              + ", ".join(f"{asset_id}={quantity!r}" for asset_id, quantity in invalid[:20])
+              + (" ……" if len(invalid) > 20 else ""))
+    cursor.execute('''
+    UPDATE assets SET purchase_date = substr(purchase_date, 1, 10)
+    WHERE length(purchase_date) > 10
+      AND purchase_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'
+    ''')
+    cursor.execute("UPDATE assets SET purchase_date = NULL WHERE purchase_date = ''")
+    # 按 (列, id) 分页排序时可以直接按索引顺序读取（索引隐含 id）
+    # 资产编号已有唯一索引，类目和维修状态在第 2 版已建立索引
+    for column in ("name", "quantity", "brand_spec", "purchase_date", "location"):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_assets_{column} ON assets({column})")
+
+
+@migration(6, "资产变更日志（供多个程序实例同步）")
+def _change_log(cursor):
+    # 每次资产添加、修改、删除记录一行，seq 单调递增；
+    # 使用人变化会通过第 4 版的触发器更新资产，因此也会记录
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS asset_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        asset_id INTEGER NOT NULL,  -- 资产数据库ID
+        kind TEXT NOT NULL  -- added、updated 或 deleted
+    )
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS assets_log_insert AFTER INSERT ON assets BEGIN
+        INSERT INTO asset_changes (asset_id, kind) VALUES (new.id, 'added');
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS assets_log_update AFTER UPDATE ON assets BEGIN
+        INSERT INTO asset_changes (asset_id, kind) VALUES (new.id, 'updated');
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS assets_log_delete AFTER DELETE ON assets BEGIN
+        INSERT INTO asset_changes (asset_id, kind) VALUES (old.id, 'deleted');
+    END
+    ''')
+    # 只保留最近的记录，落后太多的实例改为整体重新加载
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS asset_changes_prune
+    AFTER INSERT ON asset_changes WHEN new.seq % 1000 = 0 BEGIN
+        DELETE FROM asset_changes WHERE seq <= new.seq - 100000;
+    END
+    ''')
+
+
+@migration(7, "变更日志记录写入的程序实例")
+def _change_origin(cursor):
+    # 由各连接的临时触发器填写（见 install_origin_trigger），其他工具写入的记录为 NULL；
+    # ChangeFeed 据此跳过本程序实例自己提交的修改
+    cursor.execute("ALTER TABLE asset_changes ADD COLUMN origin TEXT")
+
+
+@migration(8, "资产修改只记录一条变更日志")
+def _single_update_log(cursor):
+    # 第 4 版的 assets_touch_update 用第二条 UPDATE 更新 updated_at，这条 UPDATE 也会触发
+    # assets_log_update，每次修改记录两行日志。改为在记录日志的触发器中更新 updated_at：
+    # 触发器执行期间不会被自身的语句再次触发（recursive_triggers 默认关闭），每次修改只记录一行
+    cursor.execute("DROP TRIGGER IF EXISTS assets_touch_update")
+    cursor.execute("DROP TRIGGER IF EXISTS assets_log_update")
+    cursor.execute('''
+    CREATE TRIGGER assets_log_update AFTER UPDATE ON assets BEGIN
+        INSERT INTO asset_changes (asset_id, kind) VALUES (new.id, 'updated');
+        -- 语句本身已设置 updated_at 时不再重复
+        UPDATE assets SET updated_at = CURRENT_TIMESTAMP
+         WHERE id = new.id AND new.updated_at IS old.updated_at;
+    END
+    ''')
+
+
+def install_origin_trigger(conn, origin):
+    """在连接上创建临时触发器，把该连接写入的变更日志标记为 origin（结构版本 7 起）
+
+    临时触发器只属于这个连接，不保存在数据库文件中，因此不影响其他程序和工具写入数据库。
+    """
+    if current_version(conn) < 7:
+        return
+    conn.execute(f'''
+    CREATE TEMP TRIGGER IF NOT EXISTS asset_changes_origin
+    AFTER INSERT ON main.asset_changes BEGIN
+        UPDATE asset_changes SET origin = '{origin}' WHERE seq = new.seq;
+    END
+    ''')
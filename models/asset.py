@@ -1,8 +1,70 @@
 from database import Database
 from datetime import datetime
+from models import change_events
 import os
 
+# 模型使用的关联查询（utils/diagnostics.py 会检查它们的执行计划是否使用索引）
+LOAD_USERS_SQL = "SELECT id, user_name, start_date, end_date FROM asset_users WHERE asset_id = ?"
+LOAD_REPAIR_RECORDS_SQL = """SELECT id, repair_date, fault_cause, repair_result, created_at 
+                   FROM repair_records WHERE asset_id = ? ORDER BY repair_date DESC"""
+CURRENT_USERS_SQL = "SELECT user_name FROM asset_users WHERE asset_id = ? AND end_date IS NULL"
+
+# 资产列表查询：资产表全部字段加上当前使用人（逗号分隔），一次查询完成
+# 子查询只访问当前使用人的部分索引，耗时与历史使用记录、维修记录的数量无关
+LISTING_COLUMNS_SQL = """SELECT assets.*,
+                   (SELECT group_concat(user_name, ', ') FROM asset_users
+                     WHERE asset_users.asset_id = assets.id AND end_date IS NULL) AS current_users"""
+LISTING_SQL = LISTING_COLUMNS_SQL + " FROM assets"
+LISTING_USERS_COLUMN = 14  # 列表查询结果中当前使用人所在的列（资产表共 14 列）
+LISTING_ID_BATCH = 500  # 按ID查询列表行时每条语句的ID数量（SQLite 限制参数个数）
+
+# 全文检索（FTS5 trigram）：每个检索词至少 3 个字符才能使用索引
+FULLTEXT_MIN_LENGTH = 3
+_fulltext_available = None
+
 class Asset:
+    # 精确匹配的筛选字段（可以使用索引），其余字段使用 LIKE 模糊匹配
+    EXACT_FILTER_FIELDS = ("category", "maintenance_status")
+    # 关键字搜索（资产编号、名称、品牌规格、位置、备注），优先使用全文检索
+    SEARCH_FILTER = "search"
+    SEARCH_FIELDS = ("asset_id", "name", "brand_spec", "location", "notes")
+    # 可用于排序和分页的列
+    SORTABLE_COLUMNS = {
+        "id": "assets.id",
+        "asset_id": "asset_id",
+        "name": "name",
+        "quantity": "quantity",
+        "category": "category",
+        "brand_spec": "brand_spec",
+        "purchase_date": "purchase_date",
+        "location": "location",
+        "maintenance_status": "maintenance_status",
+    }
+    # 可排序的列在列表查询结果中的位置
+    SORTABLE_COLUMN_INDEX = {
+        "id": 0, "asset_id": 1, "name": 2, "quantity": 3, "category": 4,
+        "brand_spec": 5, "purchase_date": 6, "location": 8, "maintenance_status": 10,
+    }
+    # 批量操作可以写入的字段及其默认值
+    FIELD_DEFAULTS = {
+        "asset_id": None, "name": "", "quantity": 1, "category": "", "brand_spec": "",
+        "purchase_date": None, "image_path": "", "location": "", "notes": "",
+        "maintenance_status": "正常",
+    }
+    REQUIRED_FIELDS = ("asset_id", "name", "category")
+    STATUSES = ("正常", "维修中", "已报废")
+    # bulk_insert、bulk_upsert 成功时的结果信息
+    UPSERT_INSERTED = "资产创建成功"
+    UPSERT_UPDATED = "资产更新成功"
+    UPSERT_UNCHANGED = "资产未变化"
+    
+    # 实例只保存字段和关联缓存，不使用 __dict__，大量资产对象占用的内存更少
+    __slots__ = (
+        "id", "asset_id", "name", "quantity", "category", "brand_spec", "purchase_date",
+        "image_path", "location", "notes", "maintenance_status",
+        "_db", "_users", "_repair_records",
+    )
+    
     def __init__(self, asset_id=None):
         self.id = None  # 数据库ID
         self.asset_id = asset_id  # 资产编号
@@ -16,85 +78,143 @@ class Asset:
         self.notes = ""  # 备注
         self.maintenance_status = "正常"  # 维修状态
         
-        self.users = []  # 使用人列表
-        self.repair_records = []  # 维修记录列表
-        
-        self.db = Database()
+        # 使用人列表、维修记录列表在第一次访问时才加载
+        self._users = None
+        self._repair_records = None
+        # 数据库在第一次需要时才连接，未保存的新资产不访问数据库
+        self._db = None
         
         # 如果提供了资产编号，加载资产信息
         if asset_id:
             self.load_by_asset_id(asset_id)
     
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = Database()
+        return self._db
+    
+    @staticmethod
+    def from_row(asset_data):
+        """由资产表的一行创建资产对象（不访问数据库）"""
+        asset = Asset()
+        asset._set_fields(asset_data)
+        return asset
+    
+    def _set_fields(self, asset_data):
+        self.id = asset_data[0]
+        self.asset_id = asset_data[1]
+        self.name = asset_data[2]
+        self.quantity = asset_data[3]
+        self.category = asset_data[4]
+        self.brand_spec = asset_data[5]
+        self.purchase_date = asset_data[6]
+        self.image_path = asset_data[7]
+        self.location = asset_data[8]
+        self.notes = asset_data[9]
+        self.maintenance_status = asset_data[10]
+        # 换成另一个资产后，已加载的关联不再有效
+        self._users = None
+        self._repair_records = None
+    
     def load_by_asset_id(self, asset_id):
-        """通过资产编号加载资产信息"""
+        """通过资产编号加载资产信息（使用人和维修记录在访问时加载）"""
         asset_data = self.db.fetchone(
             "SELECT * FROM assets WHERE asset_id = ?",
             (asset_id,)
         )
         
         if asset_data:
-            self.id = asset_data[0]
-            self.asset_id = asset_data[1]
-            self.name = asset_data[2]
-            self.quantity = asset_data[3]
-            self.category = asset_data[4]
-            self.brand_spec = asset_data[5]
-            self.purchase_date = asset_data[6]
-            self.image_path = asset_data[7]
-            self.location = asset_data[8]
-            self.notes = asset_data[9]
-            self.maintenance_status = asset_data[10]
-            
-            # 加载使用人信息
-            self.load_users()
-            # 加载维修记录
-            self.load_repair_records()
+            self._set_fields(asset_data)
             return True
         return False
     
     def load_by_id(self, asset_id):
-        """通过数据库ID加载资产信息"""
+        """通过数据库ID加载资产信息（使用人和维修记录在访问时加载）"""
         asset_data = self.db.fetchone(
             "SELECT * FROM assets WHERE id = ?",
             (asset_id,)
         )
         
         if asset_data:
-            self.id = asset_data[0]
-            self.asset_id = asset_data[1]
-            self.name = asset_data[2]
-            self.quantity = asset_data[3]
-            self.category = asset_data[4]
-            self.brand_spec = asset_data[5]
-            self.purchase_date = asset_data[6]
-            self.image_path = asset_data[7]
-            self.location = asset_data[8]
-            self.notes = asset_data[9]
-            self.maintenance_status = asset_data[10]
-            
-            # 加载使用人信息
-            self.load_users()
-            # 加载维修记录
-            self.load_repair_records()
+            self._set_fields(asset_data)
             return True
         return False
     
+    @staticmethod
+    def get_by_id(asset_db_id, preload=()):
+        """按数据库ID加载资产，不存在时返回 None
+        
+        preload 可包含 "users"、"repair_records"，在同一线程中一并加载这些关联，
+        供后台线程加载、界面线程显示的场景使用。
+        """
+        asset = Asset()
+        if asset.load_by_id(asset_db_id):
+            Asset.load_relationships([asset], users="users" in preload,
+                                     repair_records="repair_records" in preload)
+            return asset
+        return None
+    
+    @property
+    def users(self):
+        """使用人列表 [(记录ID, 姓名, 开始时间, 结束时间)]，第一次访问时加载"""
+        if self._users is None:
+            self.load_users()
+        return self._users
+    
+    @property
+    def repair_records(self):
+        """维修记录列表 [(记录ID, 维修时间, 故障原因, 维修结果, 创建时间)]，按维修时间倒序，第一次访问时加载"""
+        if self._repair_records is None:
+            self.load_repair_records()
+        return self._repair_records
+    
     def load_users(self):
         """加载资产使用人信息"""
-        if self.id:
-            self.users = self.db.fetchall(
-                "SELECT id, user_name, start_date, end_date FROM asset_users WHERE asset_id = ?",
-                (self.id,)
-            )
+        self._users = self.db.fetchall(LOAD_USERS_SQL, (self.id,)) if self.id else []
     
     def load_repair_records(self):
         """加载资产维修记录"""
+        self._repair_records = (self.db.fetchall(LOAD_REPAIR_RECORDS_SQL, (self.id,))
+                                if self.id else [])
+    
+    @staticmethod
+    def load_relationships(assets, users=True, repair_records=True):
+        """批量加载多个资产的使用人和维修记录：每种关联按ID分批各用一条查询，不逐个资产查询"""
+        by_id = {asset.id: asset for asset in assets if asset.id}
+        if not by_id:
+            return
+        db = Database()
+        ids = list(by_id)
+        if users:
+            loaded = {asset_db_id: [] for asset_db_id in ids}
+            for start in range(0, len(ids), LISTING_ID_BATCH):
+                batch = ids[start:start + LISTING_ID_BATCH]
+                for row in db.fetchall(
+                        f"""SELECT asset_id, id, user_name, start_date, end_date FROM asset_users
+                            WHERE asset_id IN ({', '.join('?' * len(batch))}) ORDER BY asset_id, id""",
+                        batch):
+                    loaded[row[0]].append(row[1:])
+            for asset_db_id, rows in loaded.items():
+                by_id[asset_db_id]._users = rows
+        if repair_records:
+            loaded = {asset_db_id: [] for asset_db_id in ids}
+            for start in range(0, len(ids), LISTING_ID_BATCH):
+                batch = ids[start:start + LISTING_ID_BATCH]
+                for row in db.fetchall(
+                        f"""SELECT asset_id, id, repair_date, fault_cause, repair_result, created_at
+                            FROM repair_records WHERE asset_id IN ({', '.join('?' * len(batch))})
+                            ORDER BY asset_id, repair_date DESC""",
+                        batch):
+                    loaded[row[0]].append(row[1:])
+            for asset_db_id, rows in loaded.items():
+                by_id[asset_db_id]._repair_records = rows
+    
+    def get_current_users(self):
+        """获取当前使用人姓名（未结束使用的记录）"""
         if self.id:
-            self.repair_records = self.db.fetchall(
-                """SELECT id, repair_date, fault_cause, repair_result, created_at 
-                   FROM repair_records WHERE asset_id = ? ORDER BY repair_date DESC""",
-                (self.id,)
-            )
+            return [row[0] for row in self.db.fetchall(CURRENT_USERS_SQL, (self.id,))]
+        return []
     
     def save(self, user_id):
         """保存资产信息"""
@@ -112,7 +232,10 @@ class Asset:
                 self.brand_spec, self.purchase_date, self.image_path,
                 self.location, self.notes, self.maintenance_status, self.id
             ))
-            return success
+            if success:
+                change_events.notify(self.db, change_events.UPDATED, [self.id])
+                return True, "资产更新成功"
+            return False, "资产更新失败"
         else:
             # 检查资产编号是否已存在
             if self.db.fetchone("SELECT id FROM assets WHERE asset_id = ?", (self.asset_id,)):
@@ -133,44 +256,59 @@ class Asset:
             
             if success:
                 self.id = self.db.cursor.lastrowid
+                change_events.notify(self.db, change_events.ADDED, [self.id])
                 return True, "资产创建成功"
             return False, "资产创建失败"
     
     def add_user(self, user_name, start_date, end_date=None):
         """添加资产使用人"""
         if self.id:
-            return self.db.execute("""
+            success = self.db.execute("""
                 INSERT INTO asset_users (asset_id, user_name, start_date, end_date)
                 VALUES (?, ?, ?, ?)
             """, (self.id, user_name, start_date, end_date))
+            if success:
+                self._users = None
+                change_events.notify(self.db, change_events.UPDATED, [self.id])
+            return success
         return False
     
     def update_user(self, user_record_id, end_date):
         """更新使用人记录（主要是结束日期）"""
-        return self.db.execute(
+        success = self.db.execute(
             "UPDATE asset_users SET end_date = ? WHERE id = ?",
             (end_date, user_record_id)
         )
+        if success:
+            self._users = None
+            change_events.notify(self.db, change_events.UPDATED, [self.id])
+        return success
     
     def add_repair_record(self, repair_date, fault_cause, repair_result, user_id):
         """添加维修记录"""
         if self.id:
-            success = self.db.execute("""
-                INSERT INTO repair_records (
-                    asset_id, repair_date, fault_cause, repair_result, created_by
-                ) VALUES (?, ?, ?, ?, ?)
-            """, (self.id, repair_date, fault_cause, repair_result, user_id))
-            
-            # 更新资产维修状态
-            if repair_result and "已修复" in repair_result:
-                self.maintenance_status = "正常"
-            else:
-                self.maintenance_status = "维修中"
+            # 维修记录和资产维修状态在同一事务中提交
+            with self.db.transaction():
+                success = self.db.execute("""
+                    INSERT INTO repair_records (
+                        asset_id, repair_date, fault_cause, repair_result, created_by
+                    ) VALUES (?, ?, ?, ?, ?)
+                """, (self.id, repair_date, fault_cause, repair_result, user_id))
+                if not success:
+                    return False
+                self._repair_records = None
                 
-            self.db.execute(
-                "UPDATE assets SET maintenance_status = ? WHERE id = ?",
-                (self.maintenance_status, self.id)
-            )
+                # 更新资产维修状态
+                if repair_result and "已修复" in repair_result:
+                    self.maintenance_status = "正常"
+                else:
+                    self.maintenance_status = "维修中"
+                    
+                self.db.execute(
+                    "UPDATE assets SET maintenance_status = ? WHERE id = ?",
+                    (self.maintenance_status, self.id)
+                )
+                change_events.notify(self.db, change_events.UPDATED, [self.id])
             
             return success
         return False
@@ -178,29 +316,555 @@ class Asset:
     def delete(self):
         """删除资产"""
         if self.id:
-            return self.db.execute("DELETE FROM assets WHERE id = ?", (self.id,))
+            success = self.db.execute("DELETE FROM assets WHERE id = ?", (self.id,))
+            if success:
+                change_events.notify(self.db, change_events.DELETED, [self.id])
+            return success
         return False
     
     @staticmethod
-    def get_all_assets(filters=None):
-        """获取所有资产，支持筛选"""
+    def find_ids(asset_ids, db=None):
+        """按资产编号批量查询数据库ID（按ID分批的集合查询），返回 {资产编号: 数据库ID}"""
+        db = db or Database()
+        asset_ids = list(asset_ids)
+        found = {}
+        for start in range(0, len(asset_ids), LISTING_ID_BATCH):
+            batch = asset_ids[start:start + LISTING_ID_BATCH]
+            found.update(db.fetchall(
+                f"SELECT asset_id, id FROM assets WHERE asset_id IN ({', '.join('?' * len(batch))})",
+                batch
+            ))
+        return found
+    
+    @staticmethod
+    def _existing_ids(db, asset_db_ids):
+        """返回 asset_db_ids 中仍存在的数据库ID集合"""
+        asset_db_ids = list(asset_db_ids)
+        existing = set()
+        for start in range(0, len(asset_db_ids), LISTING_ID_BATCH):
+            batch = asset_db_ids[start:start + LISTING_ID_BATCH]
+            existing.update(row[0] for row in db.fetchall(
+                f"SELECT id FROM assets WHERE id IN ({', '.join('?' * len(batch))})", batch
+            ))
+        return existing
+    
+    @staticmethod
+    def bulk_insert(records, user_id=None):
+        """批量添加资产
+        
+        records 为字段字典（键见 FIELD_DEFAULTS，缺少的字段使用默认值）。
+        所有行在一个事务中用 executemany 写入，返回与 records 一一对应的 (是否成功, 信息) 列表，
+        成功时信息为 UPSERT_INSERTED；缺少必填字段、资产编号重复或已存在的行不写入，不影响其他行。
+        """
+        records = list(records)
+        outcomes = [None] * len(records)
+        candidates = []  # (序号, 参数)
+        seen = set()
+        for index, record in enumerate(records):
+            missing = [field for field in Asset.REQUIRED_FIELDS if not record.get(field)]
+            if missing:
+                outcomes[index] = (False, f"缺少必填字段: {', '.join(missing)}")
+                continue
+            asset_id = str(record["asset_id"])
+            if asset_id in seen:
+                outcomes[index] = (False, "资产编号重复")
+                continue
+            seen.add(asset_id)
+            values = {**Asset.FIELD_DEFAULTS, **record, "asset_id": asset_id}
+            candidates.append((index, tuple(values[field] for field in Asset.FIELD_DEFAULTS)
+                               + (user_id,)))
+        
+        db = Database()
+        with db.transaction(savepoint=False):
+            # 事务以 BEGIN IMMEDIATE 开始，检查之后不会有其他连接插入同一编号
+            existing = Asset.find_ids((params[0] for _, params in candidates), db)
+            rows = []
+            for index, params in candidates:
+                if params[0] in existing:
+                    outcomes[index] = (False, "资产编号已存在")
+                else:
+                    rows.append((index, params))
+            
+            columns = ", ".join(Asset.FIELD_DEFAULTS)
+            _, errors = db.executemany(
+                f"INSERT INTO assets ({columns}, created_by) "
+                f"VALUES ({', '.join('?' * (len(Asset.FIELD_DEFAULTS) + 1))})",
+                [params for _, params in rows]
+            )
+            failed = dict(errors)
+            inserted = []
+            for position, (index, params) in enumerate(rows):
+                if position in failed:
+                    outcomes[index] = (False, f"资产创建失败: {failed[position]}")
+                else:
+                    outcomes[index] = (True, Asset.UPSERT_INSERTED)
+                    inserted.append(params[0])
+            change_events.notify(db, change_events.ADDED, Asset.find_ids(inserted, db).values())
+        return outcomes
+    
+    @staticmethod
+    def _find_fields(db, asset_ids, fields):
+        """按资产编号批量读取资产的当前字段值，返回 {资产编号: (数据库ID, {字段: 值})}"""
+        asset_ids = list(asset_ids)
+        found = {}
+        for start in range(0, len(asset_ids), LISTING_ID_BATCH):
+            batch = asset_ids[start:start + LISTING_ID_BATCH]
+            for row in db.fetchall(
+                f"SELECT id, {', '.join(fields)} FROM assets "
+                f"WHERE asset_id IN ({', '.join('?' * len(batch))})", batch
+            ):
+                values = dict(zip(fields, row[1:]))
+                found[values["asset_id"]] = (row[0], values)
+        return found
+
+    @staticmethod
+    def bulk_upsert(records, user_id=None):
+        """按资产编号批量添加或修改资产（合并导入）
+
+        records 为字段字典（键见 FIELD_DEFAULTS）。资产编号不存在的行像 bulk_insert 一样添加，
+        缺少的字段使用默认值；已存在的行只修改记录中给出的字段，与数据库完全相同的行不写入
+        （空字符串与 NULL 视为相同）。
+        先用一次集合查询读取已有资产的当前值，只有新增和有变化的行执行
+        INSERT ... ON CONFLICT(asset_id) DO UPDATE（按给出的字段分组 executemany），
+        所有行在一个事务中提交。返回与 records 一一对应的 (是否成功, 信息) 列表，
+        成功时信息为 UPSERT_INSERTED、UPSERT_UPDATED 或 UPSERT_UNCHANGED。
+        """
+        records = list(records)
+        outcomes = [None] * len(records)
+        candidates = []  # (序号, 资产编号, 记录)
+        seen = set()
+        for index, record in enumerate(records):
+            missing = [field for field in Asset.REQUIRED_FIELDS if not record.get(field)]
+            if missing:
+                outcomes[index] = (False, f"缺少必填字段: {', '.join(missing)}")
+                continue
+            asset_id = str(record["asset_id"])
+            if asset_id in seen:
+                outcomes[index] = (False, "资产编号重复")
+                continue
+            seen.add(asset_id)
+            candidates.append((index, asset_id, {**record, "asset_id": asset_id}))
+
+        db = Database()
+        with db.transaction(savepoint=False):
+            # 事务以 BEGIN IMMEDIATE 开始，读取的当前值在提交前不会被其他连接修改
+            current = Asset._find_fields(db, (asset_id for _, asset_id, _ in candidates),
+                                         tuple(Asset.FIELD_DEFAULTS))
+            groups = {}  # 给出的字段 -> [(序号, 数据库ID或None, 参数)]
+            for index, asset_id, record in candidates:
+                fields = tuple(field for field in Asset.FIELD_DEFAULTS if field in record)
+                if asset_id in current:
+                    asset_db_id, values = current[asset_id]
+                    if all(Asset._same_value(record[field], values[field]) for field in fields):
+                        outcomes[index] = (True, Asset.UPSERT_UNCHANGED)
+                        continue
+                else:
+                    asset_db_id = None
+                values = {**Asset.FIELD_DEFAULTS, **record}
+                params = tuple(values[field] for field in Asset.FIELD_DEFAULTS) + (user_id,)
+                groups.setdefault(fields, []).append((index, asset_db_id, params))
+
+            columns = ", ".join(Asset.FIELD_DEFAULTS)
+            placeholders = ", ".join("?" * (len(Asset.FIELD_DEFAULTS) + 1))
+            inserted = []
+            updated = []
+            for fields, rows in groups.items():
+                update_fields = [field for field in fields if field != "asset_id"]
+                assignments = ", ".join(f"{field} = excluded.{field}" for field in update_fields)
+                # 读取之后值没有变化的行不更新，不触发全文索引和变更日志触发器（NULL 与空字符串视为相同）
+                changed = " OR ".join(f"COALESCE(assets.{field}, '') IS NOT COALESCE(excluded.{field}, '')"
+                                      for field in update_fields)
+                _, errors = db.executemany(
+                    f"INSERT INTO assets ({columns}, created_by) VALUES ({placeholders}) "
+                    f"ON CONFLICT(asset_id) DO UPDATE SET {assignments}, "
+                    f"updated_at = CURRENT_TIMESTAMP WHERE {changed}",
+                    [params for _, _, params in rows]
+                )
+                failed = dict(errors)
+                for position, (index, asset_db_id, params) in enumerate(rows):
+                    if position in failed:
+                        outcomes[index] = (False, f"资产保存失败: {failed[position]}")
+                    elif asset_db_id is None:
+                        outcomes[index] = (True, Asset.UPSERT_INSERTED)
+                        inserted.append(params[0])
+                    else:
+                        outcomes[index] = (True, Asset.UPSERT_UPDATED)
+                        updated.append(asset_db_id)
+            change_events.notify(db, change_events.ADDED, Asset.find_ids(inserted, db).values())
+            change_events.notify(db, change_events.UPDATED, updated)
+        return outcomes
+
+    @staticmethod
+    def _same_value(value, current):
+        """导入的值与数据库中的值是否相同：空字符串与 NULL 视为相同（导入的空单元格为空字符串）"""
+        return value == current or (value in (None, "") and current in (None, ""))
+
+    @staticmethod
+    def bulk_update(records):
+        """批量修改资产
+        
+        records 为字段字典，"id" 为数据库ID，其余键为要修改的字段（见 FIELD_DEFAULTS）。
+        修改相同字段的行合并为一次 executemany，所有行在一个事务中提交；
+        返回与 records 一一对应的 (是否成功, 信息) 列表。
+        """
+        records = list(records)
+        outcomes = [None] * len(records)
+        groups = {}  # 修改的字段 -> [(序号, 数据库ID, 参数)]
+        for index, record in enumerate(records):
+            fields = tuple(field for field in Asset.FIELD_DEFAULTS if field in record)
+            if record.get("id") is None:
+                outcomes[index] = (False, "缺少数据库ID")
+            elif not fields:
+                outcomes[index] = (False, "没有要修改的字段")
+            elif any(not record[field] for field in Asset.REQUIRED_FIELDS if field in record):
+                outcomes[index] = (False, "必填字段不能为空")
+            else:
+                params = tuple(record[field] for field in fields) + (record["id"],)
+                groups.setdefault(fields, []).append((index, record["id"], params))
+        
+        db = Database()
+        with db.transaction(savepoint=False):
+            existing = Asset._existing_ids(
+                db, {asset_db_id for items in groups.values() for _, asset_db_id, _ in items})
+            updated = []
+            for fields, items in groups.items():
+                rows = []
+                for index, asset_db_id, params in items:
+                    if asset_db_id in existing:
+                        rows.append((index, asset_db_id, params))
+                    else:
+                        outcomes[index] = (False, "资产不存在")
+                assignments = ", ".join(f"{field} = ?" for field in fields)
+                _, errors = db.executemany(
+                    f"UPDATE assets SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    [params for _, _, params in rows]
+                )
+                failed = dict(errors)
+                for position, (index, asset_db_id, _) in enumerate(rows):
+                    if position in failed:
+                        outcomes[index] = (False, f"资产更新失败: {failed[position]}")
+                    else:
+                        outcomes[index] = (True, "资产更新成功")
+                        updated.append(asset_db_id)
+            change_events.notify(db, change_events.UPDATED, updated)
+        return outcomes
+    
+    @staticmethod
+    def bulk_delete(asset_db_ids):
+        """批量删除资产（使用人和维修记录随之删除），返回与 asset_db_ids 一一对应的 (是否成功, 信息) 列表"""
+        asset_db_ids = list(asset_db_ids)
+        db = Database()
+        results = {}  # 数据库ID -> (是否成功, 信息)，同一ID出现多次时只删除一次
+        with db.transaction(savepoint=False):
+            existing = Asset._existing_ids(db, asset_db_ids)
+            rows = [asset_db_id for asset_db_id in dict.fromkeys(asset_db_ids)
+                    if asset_db_id in existing]
+            _, errors = db.executemany("DELETE FROM assets WHERE id = ?",
+                                       [(asset_db_id,) for asset_db_id in rows])
+            failed = dict(errors)
+            for position, asset_db_id in enumerate(rows):
+                if position in failed:
+                    results[asset_db_id] = (False, f"删除失败: {failed[position]}")
+                else:
+                    results[asset_db_id] = (True, "资产已删除")
+            change_events.notify(db, change_events.DELETED,
+                                 [asset_db_id for asset_db_id, (ok, _) in results.items() if ok])
+        return [results.get(asset_db_id, (False, "资产不存在")) for asset_db_id in asset_db_ids]
+    
+    @staticmethod
+    def bulk_set_status(asset_db_ids, status):
+        """批量设置维修状态，返回与 asset_db_ids 一一对应的 (是否成功, 信息) 列表"""
+        asset_db_ids = list(asset_db_ids)
+        if status not in Asset.STATUSES:
+            return [(False, f"无效的维修状态: {status}")] * len(asset_db_ids)
+        return Asset.bulk_update({"id": asset_db_id, "maintenance_status": status}
+                                 for asset_db_id in asset_db_ids)
+
+    @staticmethod
+    def bulk_add_users(records):
+        """批量添加使用记录，records 为 (资产数据库ID, 使用人, 开始日期, 结束日期)
+
+        所有行在一个事务中写入，返回与 records 一一对应的 (是否成功, 信息) 列表。
+        """
+        return Asset._bulk_add_history(
+            """INSERT INTO asset_users (asset_id, user_name, start_date, end_date)
+               VALUES (?, ?, ?, ?)""", list(records), "使用记录")
+
+    @staticmethod
+    def bulk_add_repair_records(records, user_id=None):
+        """批量添加维修记录，records 为 (资产数据库ID, 维修时间, 故障原因, 维修结果)
+
+        与 add_repair_record 不同，不修改资产的维修状态（由调用方决定）。
+        返回与 records 一一对应的 (是否成功, 信息) 列表。
+        """
+        return Asset._bulk_add_history(
+            """INSERT INTO repair_records (asset_id, repair_date, fault_cause, repair_result, created_by)
+               VALUES (?, ?, ?, ?, ?)""",
+            [tuple(record) + (user_id,) for record in records], "维修记录")
+
+    @staticmethod
+    def _bulk_add_history(query, rows, label):
+        db = Database()
+        with db.transaction(savepoint=False):
+            _, errors = db.executemany(query, rows)
+            failed = dict(errors)
+            change_events.notify(db, change_events.UPDATED,
+                                 {row[0] for position, row in enumerate(rows) if position not in failed})
+        return [(False, f"{label}添加失败: {failed[position]}") if position in failed
+                else (True, f"{label}添加成功") for position in range(len(rows))]
+
+    @staticmethod
+    def bulk_set_location(asset_db_ids, location):
+        """批量更改设备位置，返回与 asset_db_ids 一一对应的 (是否成功, 信息) 列表"""
+        return Asset.bulk_update({"id": asset_db_id, "location": location}
+                                 for asset_db_id in asset_db_ids)
+
+    @staticmethod
+    def bulk_end_usage(asset_db_ids, end_date):
+        """批量结束资产的当前使用（给所有未结束的使用记录填写结束日期）
+
+        所有资产在一个事务中处理，返回与 asset_db_ids 一一对应的 (是否成功, 信息) 列表。
+        """
+        asset_db_ids = list(asset_db_ids)
         db = Database()
-        query = "SELECT * FROM assets"
+        results = {}  # 数据库ID -> (是否成功, 信息)
+        with db.transaction(savepoint=False):
+            existing = Asset._existing_ids(db, asset_db_ids)
+            in_use = set()
+            ids = list(existing)
+            for start in range(0, len(ids), LISTING_ID_BATCH):
+                batch = ids[start:start + LISTING_ID_BATCH]
+                in_use.update(row[0] for row in db.fetchall(
+                    f"""SELECT DISTINCT asset_id FROM asset_users
+                        WHERE end_date IS NULL AND asset_id IN ({', '.join('?' * len(batch))})""",
+                    batch
+                ))
+            rows = [asset_db_id for asset_db_id in dict.fromkeys(asset_db_ids)
+                    if asset_db_id in in_use]
+            _, errors = db.executemany(
+                "UPDATE asset_users SET end_date = ? WHERE asset_id = ? AND end_date IS NULL",
+                [(end_date, asset_db_id) for asset_db_id in rows]
+            )
+            failed = dict(errors)
+            for position, asset_db_id in enumerate(rows):
+                if position in failed:
+                    results[asset_db_id] = (False, f"结束使用失败: {failed[position]}")
+                else:
+                    results[asset_db_id] = (True, "已结束使用")
+            change_events.notify(db, change_events.UPDATED,
+                                 [asset_db_id for asset_db_id, (ok, _) in results.items() if ok])
+        return [results.get(asset_db_id) or
+                ((False, "没有在用的使用人") if asset_db_id in existing else (False, "资产不存在"))
+                for asset_db_id in asset_db_ids]
+
+    @staticmethod
+    def build_filter(filters=None):
+        """根据筛选条件生成 WHERE 子句和参数"""
+        conditions = []
         params = []
         
         if filters and isinstance(filters, dict):
-            conditions = []
             for key, value in filters.items():
                 if value:
-                    conditions.append(f"{key} LIKE ?")
-                    params.append(f"%{value}%")
-            
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
+                    if key == Asset.SEARCH_FILTER:
+                        condition, values = Asset._search_condition(value)
+                        conditions.append(condition)
+                        params.extend(values)
+                    elif key in Asset.EXACT_FILTER_FIELDS:
+                        conditions.append(f"{key} = ?")
+                        params.append(value)
+                    else:
+                        conditions.append(f"{key} LIKE ?")
+                        params.append(f"%{value}%")
+        
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, params
+    
+    @staticmethod
+    def fulltext_available():
+        """数据库中是否存在全文检索索引（进程内只检查一次）"""
+        global _fulltext_available
+        if _fulltext_available is None:
+            db = Database()
+            _fulltext_available = db.fetchone(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'assets_fts'"
+            ) is not None
+        return _fulltext_available
+    
+    @staticmethod
+    def _search_terms(text):
+        return [term for term in str(text).split() if term]
+    
+    @staticmethod
+    def can_rank(text):
+        """关键字能否使用全文检索（可以按相关度排序）"""
+        terms = Asset._search_terms(text or "")
+        return (bool(terms) and Asset.fulltext_available()
+                and all(len(term) >= FULLTEXT_MIN_LENGTH for term in terms))
+    
+    @staticmethod
+    def _fulltext_query(text):
+        """把关键字转换为 FTS5 查询：每个词作为短语，多个词同时匹配"""
+        return " ".join('"' + term.replace('"', '""') + '"' for term in Asset._search_terms(text))
+    
+    @staticmethod
+    def _search_condition(text):
+        """关键字搜索条件：能使用全文检索时查询索引，否则对各字段做 LIKE 匹配"""
+        if Asset.can_rank(text):
+            return ("assets.id IN (SELECT rowid FROM assets_fts WHERE assets_fts MATCH ?)",
+                    [Asset._fulltext_query(text)])
         
-        query += " ORDER BY asset_id"
+        conditions = []
+        params = []
+        for term in Asset._search_terms(text):
+            conditions.append(
+                "(" + " OR ".join(f"{field} LIKE ?" for field in Asset.SEARCH_FIELDS) + ")"
+            )
+            params.extend([f"%{term}%"] * len(Asset.SEARCH_FIELDS))
+        return " AND ".join(conditions) or "1", params
+    
+    @staticmethod
+    def get_all_assets(filters=None):
+        """获取所有资产，支持筛选"""
+        db = Database()
+        where, params = Asset.build_filter(filters)
+        query = "SELECT * FROM assets" + where + " ORDER BY asset_id"
         return db.fetchall(query, params)
     
+    @staticmethod
+    def list_assets(filters=None):
+        """获取资产列表（含当前使用人），用于主窗口表格显示"""
+        db = Database()
+        where, params = Asset.build_filter(filters)
+        query = LISTING_SQL + where + " ORDER BY asset_id"
+        return db.fetchall(query, params)
+    
+    @staticmethod
+    def get_assets_page(filters=None, cursor=None, page_size=500,
+                        order_by="asset_id", descending=False, with_total=False):
+        """按页获取资产列表（键集分页）
+        
+        按 (排序列, id) 排序，cursor 为上一页最后一行的 (排序列的值, id)，
+        第一页传 None。查询从游标位置直接定位，不使用 OFFSET，
+        因此每页的耗时与翻到第几页无关。
+        返回 (行列表, 下一页游标, 总数)；没有下一页时游标为 None，
+        总数仅在 with_total 为 True 时统计，否则为 None。
+        order_by 为 "rank" 时按搜索相关度排序，此时筛选条件中的关键字必须满足 can_rank。
+        查询出错（如数据库被锁定）时抛出异常，不会把空页当作已读完，逐页读取的导出不会在中途静默结束。
+        """
+        if order_by == "rank":
+            return Asset._get_ranked_page(filters, cursor, page_size, with_total)
+        if order_by not in Asset.SORTABLE_COLUMNS:
+            raise ValueError(f"不支持的排序列: {order_by}")
+        column = Asset.SORTABLE_COLUMNS[order_by]
+        
+        db = Database()
+        where, params = Asset.build_filter(filters)
+        
+        direction = "DESC" if descending else "ASC"
+        order = f" ORDER BY {column} {direction}, assets.id {direction} LIMIT ?"
+        rows = []
+        for seek, seek_params in Asset._page_segments(column, cursor, descending):
+            segment_where = (where + " AND " if where else " WHERE ") + seek if seek else where
+            rows += db.iterate(LISTING_SQL + segment_where + order,
+                               params + seek_params + [page_size - len(rows)])
+            if len(rows) == page_size:
+                break
+        
+        next_cursor = None
+        if len(rows) == page_size:
+            last = rows[-1]
+            next_cursor = (last[Asset.SORTABLE_COLUMN_INDEX[order_by]], last[0])
+        
+        total = Asset.count_assets(filters) if with_total else None
+        return rows, next_cursor, total
+    
+    @staticmethod
+    def _page_segments(column, cursor, descending):
+        """键集分页从游标位置开始依次查询的各段，返回 [(定位条件, 参数)]，第一页为 [(None, [])]
+        
+        升序时 NULL 排在最前，降序时排在最后。与游标值相同的行、其后的非 NULL 行和 NULL 行分段查询，
+        每段的定位条件都是排序列索引上的范围（排序列 = 值 AND id > 上一行、排序列 > 值等），
+        查询直接从游标位置开始读索引。
+        """
+        if cursor is None:
+            return [(None, [])]
+        value, last_id = cursor
+        op = "<" if descending else ">"
+        if value is None:
+            segments = [(f"{column} IS NULL AND assets.id {op} ?", [last_id])]
+            if not descending:
+                segments.append((f"{column} IS NOT NULL", []))
+        else:
+            segments = [(f"{column} = ? AND assets.id {op} ?", [value, last_id]),
+                        (f"{column} {op} ?", [value])]
+            if descending:
+                segments.append((f"{column} IS NULL", []))
+        return segments
+    
+    @staticmethod
+    def _get_ranked_page(filters, cursor, page_size, with_total):
+        """按全文检索相关度（bm25，越小越相关）分页，游标为 (相关度, id)"""
+        other_filters = dict(filters or {})
+        text = other_filters.pop(Asset.SEARCH_FILTER, "")
+        if not Asset.can_rank(text):
+            raise ValueError("关键字无法使用全文检索排序")
+        
+        db = Database()
+        where, params = Asset.build_filter(other_filters)
+        if cursor is not None:
+            score, last_id = cursor
+            seek = "(ranked.score > ? OR (ranked.score = ? AND assets.id > ?))"
+            where = (where + " AND " if where else " WHERE ") + seek
+            params = params + [score, score, last_id]
+        
+        query = (LISTING_COLUMNS_SQL + """, ranked.score
+                 FROM (SELECT rowid AS fts_id, bm25(assets_fts) AS score
+                         FROM assets_fts WHERE assets_fts MATCH ?) AS ranked
+                 JOIN assets ON assets.id = ranked.fts_id""" + where +
+                 " ORDER BY ranked.score, assets.id LIMIT ?")
+        rows = list(db.iterate(query, [Asset._fulltext_query(text)] + params + [page_size]))
+        
+        next_cursor = None
+        if len(rows) == page_size:
+            next_cursor = (rows[-1][LISTING_USERS_COLUMN + 1], rows[-1][0])
+        
+        total = Asset.count_assets(filters) if with_total else None
+        return rows, next_cursor, total
+    
+    @staticmethod
+    def iter_assets(filters=None, page_size=1000, order_by="asset_id"):
+        """逐页遍历所有符合条件的资产，内存占用只与页大小有关，查询出错时抛出异常"""
+        cursor = None
+        while True:
+            rows, cursor, _ = Asset.get_assets_page(filters, cursor, page_size, order_by)
+            yield from rows
+            if cursor is None:
+                break
+    
+    @staticmethod
+    def count_assets(filters=None):
+        """统计符合筛选条件的资产数量"""
+        db = Database()
+        where, params = Asset.build_filter(filters)
+        result = db.fetchone("SELECT COUNT(*) FROM assets" + where, params)
+        return result[0] if result else 0
+    
+    @staticmethod
+    def get_listing_rows(asset_db_ids, filters=None):
+        """按数据库ID获取符合筛选条件的资产列表行（用于局部刷新表格），返回 {数据库ID: 行}"""
+        db = Database()
+        where, params = Asset.build_filter(filters)
+        ids = list(asset_db_ids)
+        rows = {}
+        for start in range(0, len(ids), LISTING_ID_BATCH):
+            batch = ids[start:start + LISTING_ID_BATCH]
+            condition = f"assets.id IN ({', '.join('?' * len(batch))})"
+            query = LISTING_SQL + (where + " AND " if where else " WHERE ") + condition
+            for row in db.fetchall(query, params + batch):
+                rows[row[0]] = row
+        return rows
+    
     @staticmethod
     def get_categories():
         """获取所有资产类目"""
@@ -0,0 +1,359 @@
+"""资产列表的内存列式缓存（可选，需要 numpy）
+
+按列保存资产列表：数值列使用 numpy 数组，类目、位置、状态、入库时间等重复值多的列
+保存为整数编码加取值表，其余文本列保存为对象数组。筛选、搜索和排序都在数组上批量计算，
+不再逐行访问数据库或构造行对象；表格需要显示某一行时才用 row() 生成该行的元组。
+"""
+import re
+import sys
+from database import Database
+from models.asset import Asset, LISTING_SQL, LISTING_USERS_COLUMN, LISTING_ID_BATCH
+
+try:
+    import numpy as np
+except ImportError:  # numpy 随 pandas 一起安装，缺失时缓存不可用
+    np = None
+
+# 列表查询结果中各列的位置
+_COLUMN_INDEX = {
+    "id": 0, "asset_id": 1, "name": 2, "quantity": 3, "category": 4,
+    "brand_spec": 5, "purchase_date": 6, "location": 8, "notes": 9,
+    "maintenance_status": 10, "current_users": LISTING_USERS_COLUMN,
+}
+# 整数编码（字符串驻留）的列
+INTERNED_COLUMNS = ("category", "location", "maintenance_status", "purchase_date")
+# 对象数组保存的文本列
+TEXT_COLUMNS = ("asset_id", "name", "brand_spec", "notes", "current_users")
+# 列表行的长度（资产表各列加当前使用人）
+_ROW_LENGTH = LISTING_USERS_COLUMN + 1
+
+
+def _line_starts(parts):
+    """各行在换行连接后的整段文本中的起始位置"""
+    lengths = np.fromiter(map(len, parts), dtype=np.int64, count=len(parts))
+    starts = np.zeros(len(parts), dtype=np.int64)
+    np.cumsum(lengths[:-1] + 1, out=starts[1:])
+    return starts
+
+
+def _search_text(row):
+    """一行中参与关键字搜索的字段，小写后以分隔符连接（与 Asset.SEARCH_FIELDS 对应）"""
+    text = "\x1f".join(row[_COLUMN_INDEX[field]] or "" for field in Asset.SEARCH_FIELDS)
+    return text.replace("\n", " ").lower()
+
+
+def _quantity(value):
+    """缓存中的数量：早期数据中不是整数的数量（见第 5 版迁移，未自动修改）按 0 处理"""
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def cache_available():
+    """运行环境是否支持内存缓存"""
+    return np is not None
+
+
+class _InternedColumn:
+    """整数编码的字符串列：相同的值只保存一次"""
+
+    def __init__(self):
+        self.values = []  # 编码 -> 值
+        self.lookup = {}  # 值 -> 编码
+        self.codes = np.empty(0, dtype=np.int32)
+
+    def encode(self, values):
+        lookup = self.lookup
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            code = lookup.get(value)
+            if code is None:
+                code = len(self.values)
+                lookup[value] = code
+                self.values.append(value)
+            codes[i] = code
+        return codes
+
+    def sort_rank(self):
+        """每个编码在取值排序中的位置（NULL 排在最前，与 SQLite 一致）"""
+        order = sorted(range(len(self.values)),
+                       key=lambda code: (self.values[code] is not None, self.values[code] or ""))
+        rank = np.empty(len(self.values), dtype=np.int32)
+        rank[order] = np.arange(len(order), dtype=np.int32)
+        return rank
+
+
+class AssetCache:
+    """资产列表的内存列式缓存
+
+    load() 从数据库读取全部资产，refresh() 按变更日志 asset_changes（见第 6 版迁移）只读取
+    上次读取后变化的资产，并移除已删除的资产；日志序号没有变化时不查询资产表。
+    （数据库触发器保证使用人变化也会更新资产，因此也会记录在变更日志中。）
+    refresh() 分为只查询数据库的 read_changes() 和只更新数组的 apply_changes()，
+    界面在后台线程中读取、在界面线程中更新。
+    缓存只在界面线程中使用（load 可以在后台线程中执行），不做加锁。
+    """
+
+    def __init__(self):
+        if np is None:
+            raise RuntimeError("内存缓存需要 numpy")
+        self.db = Database()
+        self._reset()
+
+    def _reset(self):
+        self.ids = np.empty(0, dtype=np.int64)  # 按 id 升序保存
+        self.quantity = np.empty(0, dtype=np.int32)
+        self.interned = {column: _InternedColumn() for column in INTERNED_COLUMNS}
+        self.text = {column: np.empty(0, dtype=object) for column in TEXT_COLUMNS}
+        self.search_text = np.empty(0, dtype=object)  # 每行参与关键字搜索的小写文本
+        self.last_seq = None  # 已读取到的变更日志序号
+        self._search_blob = None  # (小写的搜索文本, 每行起始位置)，按需生成
+        self._sort_ranks = {}  # 列 -> 每行的排序位置，按需生成
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _max_seq(self):
+        return next(self.db.iterate("SELECT MAX(seq) FROM asset_changes"))[0] or 0
+
+    def load(self):
+        """从数据库读取全部资产"""
+        return self.apply_changes(self.read_changes(None))
+
+    def refresh(self):
+        """增量刷新：读取上次读取后变化的资产并移除已删除的资产，返回实际变化的行数
+
+        读取和更新都在当前线程中执行；界面中应在后台线程调用 read_changes，
+        再在界面线程调用 apply_changes。
+        """
+        return self.apply_changes(self.read_changes(self.last_seq))
+
+    def read_changes(self, since):
+        """读取变更日志序号 since 之后变化的资产（只查询数据库，不修改缓存，可以在后台线程中执行）
+
+        返回 (日志序号, 变化的资产ID列表, 列表行)，交给 apply_changes 更新缓存；日志序号没有变化时
+        返回 None。since 为 None 或之后的日志已被清理（无法确定哪些资产变化了）时读取全部资产，
+        此时变化的资产ID列表为 None。查询出错时抛出异常（读到的行不完整时不能据此判断哪些资产已删除）。
+        """
+        latest = self._max_seq()
+        if since is not None:
+            if latest == since:
+                return None
+            first = self.db.fetchone("SELECT MIN(seq) FROM asset_changes")
+            if first and first[0] is not None and first[0] > since + 1:
+                since = None
+        if since is None:
+            # 先记下日志序号：读取期间提交的修改会在下次刷新时再读取一次
+            return latest, None, list(self.db.iterate(LISTING_SQL + " ORDER BY assets.id"))
+
+        changed_ids = sorted({row[0] for row in self.db.iterate(
+            "SELECT asset_id FROM asset_changes WHERE seq > ? AND seq <= ?", (since, latest)
+        )})
+        rows = []
+        for start in range(0, len(changed_ids), LISTING_ID_BATCH):
+            batch = changed_ids[start:start + LISTING_ID_BATCH]
+            rows += self.db.iterate(
+                LISTING_SQL + f" WHERE assets.id IN ({', '.join('?' * len(batch))})", batch)
+        return latest, changed_ids, rows
+
+    def apply_changes(self, changes):
+        """按 read_changes 的结果更新缓存（不查询数据库），返回实际变化的行数
+
+        只有值确实不同的行才计为变化，没有变化时保留已生成的搜索文本和排序位置。
+        """
+        if changes is None:
+            return 0
+        latest, changed_ids, rows = changes
+        if changed_ids is None:
+            self._reset()
+            self._append(rows)
+            self.last_seq = latest
+            return len(rows)
+        self.last_seq = latest
+
+        changed = 0
+        new_rows = []
+        for row in rows:
+            pos = self._position(row[0])
+            if pos is None:
+                new_rows.append(row)
+            elif self._differs(pos, row):
+                self._update(pos, row)
+                changed += 1
+        if changed:
+            self._invalidate()
+        if new_rows:
+            self._append(new_rows)
+            changed += len(new_rows)
+
+        # 日志中有记录、资产表中已经没有的资产已被删除
+        found = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        removed = np.isin(self.ids, np.setdiff1d(np.array(changed_ids, dtype=np.int64), found))
+        if removed.any():
+            changed += int(removed.sum())
+            self._keep(~removed)
+            self._invalidate()
+        return changed
+
+    def _position(self, asset_db_id):
+        pos = int(np.searchsorted(self.ids, asset_db_id))
+        if pos < len(self.ids) and self.ids[pos] == asset_db_id:
+            return pos
+        return None
+
+    def _append(self, rows):
+        """追加行（行的 id 大于已有的 id 时直接追加，否则追加后重新按 id 排序）"""
+        if not rows:
+            return
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        needs_sort = len(self.ids) and ids.min() < self.ids[-1]
+        self.ids = np.concatenate([self.ids, ids])
+        self.quantity = np.concatenate([
+            self.quantity,
+            np.fromiter((_quantity(row[3]) for row in rows), dtype=np.int32, count=len(rows))
+        ])
+        for column, interned in self.interned.items():
+            index = _COLUMN_INDEX[column]
+            interned.codes = np.concatenate([interned.codes, interned.encode([row[index] for row in rows])])
+        for column in TEXT_COLUMNS:
+            index = _COLUMN_INDEX[column]
+            values = np.empty(len(rows), dtype=object)
+            values[:] = [row[index] or "" for row in rows]
+            self.text[column] = np.concatenate([self.text[column], values])
+        search_text = np.empty(len(rows), dtype=object)
+        search_text[:] = [_search_text(row) for row in rows]
+        self.search_text = np.concatenate([self.search_text, search_text])
+        if needs_sort:
+            self._keep(np.argsort(self.ids, kind="stable"))
+        self._invalidate()
+
+    def _differs(self, pos, row):
+        """第 pos 行缓存的值是否与列表行不同"""
+        if self.quantity[pos] != _quantity(row[3]):
+            return True
+        for column, interned in self.interned.items():
+            if interned.values[interned.codes[pos]] != row[_COLUMN_INDEX[column]]:
+                return True
+        return any(self.text[column][pos] != (row[_COLUMN_INDEX[column]] or "")
+                   for column in TEXT_COLUMNS)
+
+    def _update(self, pos, row):
+        self.quantity[pos] = _quantity(row[3])
+        for column, interned in self.interned.items():
+            interned.codes[pos] = interned.encode([row[_COLUMN_INDEX[column]]])[0]
+        for column in TEXT_COLUMNS:
+            self.text[column][pos] = row[_COLUMN_INDEX[column]] or ""
+        self.search_text[pos] = _search_text(row)
+
+    def _keep(self, selector):
+        """按布尔掩码或位置数组保留/重排所有列"""
+        self.ids = self.ids[selector]
+        self.quantity = self.quantity[selector]
+        for interned in self.interned.values():
+            interned.codes = interned.codes[selector]
+        for column in TEXT_COLUMNS:
+            self.text[column] = self.text[column][selector]
+        self.search_text = self.search_text[selector]
+
+    def _invalidate(self):
+        self._search_blob = None
+        self._sort_ranks = {}
+
+    def row(self, pos):
+        """生成第 pos 行的列表行元组（与 Asset.list_assets 的结果格式相同，
+        未缓存的图片路径、创建人、创建和更新时间为 None）"""
+        row = [None] * _ROW_LENGTH
+        row[0] = int(self.ids[pos])
+        row[3] = int(self.quantity[pos])
+        for column, interned in self.interned.items():
+            row[_COLUMN_INDEX[column]] = interned.values[interned.codes[pos]]
+        for column in TEXT_COLUMNS:
+            row[_COLUMN_INDEX[column]] = self.text[column][pos]
+        return tuple(row)
+
+    def filter(self, filters=None):
+        """按筛选条件（与 Asset.build_filter 相同的格式）返回符合条件的行位置数组"""
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, value in (filters or {}).items():
+            if not value:
+                continue
+            if key == Asset.SEARCH_FILTER:
+                mask &= self._search_mask(value)
+            elif key in self.interned:
+                interned = self.interned[key]
+                if key in Asset.EXACT_FILTER_FIELDS:
+                    code = interned.lookup.get(value)
+                    matched = [] if code is None else [code]
+                else:
+                    matched = [code for code, v in enumerate(interned.values)
+                               if v is not None and str(value) in v]
+                # 只在取值表上做比较，再按编码批量匹配
+                mask &= np.isin(interned.codes, np.array(matched, dtype=np.int32))
+            elif key in self.text:
+                parts = [v.replace("\n", " ").lower() for v in self.text[key]]
+                mask &= self._substring_mask("\n".join(parts), _line_starts(parts), str(value).lower())
+            else:
+                raise ValueError(f"缓存不支持的筛选字段: {key}")
+        return np.flatnonzero(mask)
+
+    def _search_mask(self, text):
+        """关键字搜索：每个词都要在资产编号、名称、规格、位置、备注中出现（不区分大小写）"""
+        if self._search_blob is None:
+            self._search_blob = ("\n".join(self.search_text), _line_starts(self.search_text))
+        blob, starts = self._search_blob
+        mask = np.ones(len(self.ids), dtype=bool)
+        for term in Asset._search_terms(text):
+            mask &= self._substring_mask(blob, starts, term.lower())
+        return mask
+
+    def _substring_mask(self, blob, starts, needle):
+        """在换行分隔的整段文本中查找子串，用 searchsorted 把命中位置批量换算为行"""
+        mask = np.zeros(len(self.ids), dtype=bool)
+        if not len(self.ids) or "\n" in needle:
+            return mask
+        hits = np.fromiter((m.start() for m in re.finditer(re.escape(needle), blob)), dtype=np.int64)
+        if hits.size:
+            mask[np.searchsorted(starts, hits, side="right") - 1] = True
+        return mask
+
+    def sort(self, positions, order_by="asset_id", descending=False):
+        """对行位置数组排序（排序列相同时按 id），返回新的位置数组"""
+        if order_by == "id":
+            key = self.ids
+        elif order_by == "quantity":
+            key = self.quantity
+        elif order_by in self.interned:
+            interned = self.interned[order_by]
+            key = interned.sort_rank()[interned.codes]
+        elif order_by in self.text:
+            key = self._text_rank(order_by)
+        else:
+            raise ValueError(f"不支持的排序列: {order_by}")
+        key = key[positions]
+        ids = self.ids[positions]
+        if descending:
+            key = -key.astype(np.int64)
+            ids = -ids
+        return positions[np.lexsort((ids, key))]
+
+    def _text_rank(self, column):
+        """文本列每行的排序位置（第一次按该列排序时计算，数据变化后失效）"""
+        rank = self._sort_ranks.get(column)
+        if rank is None:
+            order = np.argsort(self.text[column], kind="stable")
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order), dtype=np.int64)
+            self._sort_ranks[column] = rank
+        return rank
+
+    def memory_usage(self):
+        """估算缓存占用的内存字节数"""
+        total = self.ids.nbytes + self.quantity.nbytes
+        for interned in self.interned.values():
+            total += interned.codes.nbytes + sum(sys.getsizeof(v) for v in interned.values)
+        for values in (*self.text.values(), self.search_text):
+            total += values.nbytes + sum(sys.getsizeof(v) for v in values)
+        if self._search_blob is not None:
+            total += sys.getsizeof(self._search_blob[0]) + self._search_blob[1].nbytes
+        return total
@@ -0,0 +1,62 @@
+"""资产变更通知
+
+模型方法写入数据库后调用 notify()，说明哪些资产（数据库ID）被添加、修改或删除；
+事务提交后监听者收到 (变更类型, 资产ID集合)，事务回滚时不通知。
+同一事务中的多次通知按类型合并，批量导入等操作只产生一次通知。
+监听者在写入数据库的线程中被调用，界面需要自行转到界面线程处理。
+"""
+import threading
+
+ADDED = "added"
+UPDATED = "updated"
+DELETED = "deleted"
+
+_listeners = []
+_local = threading.local()
+
+
+def add_listener(callback):
+    """登记监听者 callback(kind, ids)"""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def remove_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def notify(db, kind, ids):
+    """记录资产变更，在 db 当前事务提交后通知监听者（不在事务中时立即通知）
+
+    通知只说明哪些资产可能变化，监听者应重新读取这些资产；
+    事务回滚后残留的记录会随下一次通知发出，只会多读取几行。
+    """
+    ids = {asset_db_id for asset_db_id in ids if asset_db_id is not None}
+    if not ids:
+        return
+    pending = getattr(_local, "pending", None)
+    if pending is None:
+        pending = _local.pending = {}
+    pending.setdefault(kind, set()).update(ids)
+    db.after_commit(_flush)
+
+
+def _flush():
+    pending = getattr(_local, "pending", None)
+    _local.pending = None
+    if not pending:
+        return
+    # 同一资产只按最终结果通知一次：删除优先，其次添加
+    added = pending.get(ADDED, set())
+    deleted = pending.get(DELETED, set())
+    changes = ((ADDED, added - deleted),
+               (UPDATED, pending.get(UPDATED, set()) - added - deleted),
+               (DELETED, deleted))
+    for kind, ids in changes:
+        if ids:
+            for callback in list(_listeners):
+                try:
+                    callback(kind, frozenset(ids))
+                except Exception as e:
+                    print(f"资产变更通知错误: {e}")
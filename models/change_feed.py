@@ -0,0 +1,70 @@
+"""跨程序实例的资产变更跟踪
+
+多个程序实例共用同一个数据库文件时，其他实例的修改由触发器记录在 asset_changes 表中
+（见第 6 版迁移）。ChangeFeed 定期检查 PRAGMA data_version：其他连接提交过修改时该值才会变化，
+检查本身不读取任何表；变化后只读取上次同步之后的变更记录。
+本进程的后台线程使用其他连接写入，同样会改变 data_version；这些修改在提交时已经通知过，
+变更记录上标记了本程序实例的 origin（见第 7 版迁移），读取时跳过。
+"""
+from database import Database
+from models import change_events
+
+
+class ChangeFeed:
+    """资产变更日志的读取位置
+
+    PRAGMA data_version 只对执行它的连接有意义，因此 poll() 应始终在同一线程中调用。
+    """
+
+    def __init__(self):
+        self.db = Database()
+        self.data_version = self._data_version()
+        self.last_seq = self._max_seq()
+
+    def _data_version(self):
+        return self.db.fetchone("PRAGMA data_version")[0]
+
+    def _max_seq(self):
+        result = self.db.fetchone("SELECT MAX(seq) FROM asset_changes")
+        return (result[0] or 0) if result else 0
+
+    def poll(self):
+        """读取上次同步后的变更
+
+        返回 (变更, 是否完整)：变更为 {变更类型: 资产ID集合}，没有新变更时为空字典；
+        上次同步后的记录已被清理时返回 ({}, False)，调用方应整体重新加载。
+        """
+        version = self._data_version()
+        if version == self.data_version:
+            return {}, True
+        self.data_version = version
+
+        first = self.db.fetchone("SELECT MIN(seq) FROM asset_changes")
+        if first and first[0] is not None and first[0] > self.last_seq + 1:
+            self.last_seq = self._max_seq()
+            return {}, False
+
+        latest = self._max_seq()
+        rows = self.db.fetchall(
+            """SELECT seq, asset_id, kind FROM asset_changes
+                WHERE seq > ? AND seq <= ? AND origin IS NOT ? ORDER BY seq""",
+            (self.last_seq, latest, self.db.manager.origin)
+        )
+        self.last_seq = latest
+        if not rows:
+            return {}, True
+
+        # 每个资产只按最终结果归类（资产ID不会重复使用）
+        kinds = {}
+        for _, asset_db_id, kind in rows:
+            kinds.setdefault(asset_db_id, set()).add(kind)
+        changes = {}
+        for asset_db_id, seen in kinds.items():
+            if change_events.DELETED in seen:
+                kind = change_events.DELETED
+            elif change_events.ADDED in seen:
+                kind = change_events.ADDED
+            else:
+                kind = change_events.UPDATED
+            changes.setdefault(kind, set()).add(asset_db_id)
+        return changes, True
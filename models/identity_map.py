@@ -0,0 +1,158 @@
+"""资产对象的标识映射（LRU 缓存）
+
+同一资产在一次登录会话中往往被多次加载（表格选中后打开编辑、使用人、维修记录对话框）。
+标识映射按数据库ID和资产编号保存最近使用的 Asset 对象，再次需要时直接返回同一个对象，
+对象上已加载的使用人和维修记录也一并复用。映射中的对象都是刚从数据库读取的。
+资产变更通知（本程序的写入，以及 ChangeFeed 同步到的其他实例的修改）会使对应的对象失效。
+每次登录创建新的映射，退出登录时用 reset_identity_map() 丢弃。
+"""
+import os
+import threading
+from collections import OrderedDict
+from models import change_events
+from models.asset import Asset
+
+DEFAULT_SIZE = 256
+# 缓存的资产数量可用环境变量配置，0 表示不缓存
+SIZE_ENV = "ASSET_IDENTITY_MAP_SIZE"
+
+
+class AssetIdentityMap:
+    """按数据库ID和资产编号缓存 Asset 对象，超出容量时淘汰最久未使用的对象
+
+    可以在多个线程中使用（对话框在后台线程加载资产）。
+    """
+
+    def __init__(self, maxsize=DEFAULT_SIZE):
+        self.maxsize = maxsize
+        self._assets = OrderedDict()  # 数据库ID -> (Asset, 资产编号)，最近使用的在末尾
+        self._by_asset_id = {}  # 资产编号 -> 数据库ID
+        self._lock = threading.Lock()
+        self._version = 0  # 每次失效递增，用于丢弃失效前开始加载的对象
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        change_events.add_listener(self._on_change)
+
+    def get_by_id(self, asset_db_id, preload=()):
+        """按数据库ID获取资产，不存在时返回 None
+
+        preload 中的关联（"users"、"repair_records"）尚未加载时在当前线程加载。
+        """
+        with self._lock:
+            asset = self._hit(asset_db_id)
+            version = self._version
+        if asset is None:
+            asset = Asset.get_by_id(asset_db_id)
+            if asset is None:
+                return None
+            asset = self._add(asset, version)
+        for name in preload:
+            getattr(asset, name)
+        return asset
+
+    def get_by_asset_id(self, asset_id, preload=()):
+        """按资产编号获取资产，不存在时返回 None"""
+        with self._lock:
+            asset = self._hit(self._by_asset_id.get(asset_id))
+            version = self._version
+        if asset is None:
+            asset = Asset(asset_id)
+            if not asset.id:
+                return None
+            asset = self._add(asset, version)
+        for name in preload:
+            getattr(asset, name)
+        return asset
+
+    def _hit(self, asset_db_id):
+        entry = self._assets.get(asset_db_id) if asset_db_id is not None else None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._assets.move_to_end(asset_db_id)
+        self.hits += 1
+        return entry[0]
+
+    def _add(self, asset, version):
+        with self._lock:
+            if self.maxsize <= 0 or version != self._version:
+                # 加载期间有资产失效，无法确定这个对象是否最新，不缓存
+                return asset
+            entry = self._assets.get(asset.id)
+            if entry is not None:
+                self._assets.move_to_end(asset.id)
+                return entry[0]
+            self._assets[asset.id] = (asset, asset.asset_id)
+            self._by_asset_id[asset.asset_id] = asset.id
+            while len(self._assets) > self.maxsize:
+                _, (_, asset_id) = self._assets.popitem(last=False)
+                self._by_asset_id.pop(asset_id, None)
+                self.evictions += 1
+            return asset
+
+    def invalidate(self, asset_db_ids):
+        """使指定资产的缓存对象失效"""
+        with self._lock:
+            self._version += 1
+            for asset_db_id in asset_db_ids:
+                entry = self._assets.pop(asset_db_id, None)
+                if entry is not None:
+                    self._by_asset_id.pop(entry[1], None)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._assets.clear()
+            self._by_asset_id.clear()
+
+    def close(self):
+        """清空并停止接收资产变更通知（会话结束）"""
+        change_events.remove_listener(self._on_change)
+        self.clear()
+
+    def _on_change(self, kind, ids):
+        self.invalidate(ids)
+
+    def stats(self):
+        """缓存统计：容量、已缓存数量、命中、未命中、命中率、淘汰和失效次数"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "maxsize": self.maxsize,
+                "size": len(self._assets),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_identity_map = None
+_identity_map_lock = threading.Lock()
+
+
+def get_identity_map():
+    """获取当前登录会话共用的资产标识映射（不存在时创建）"""
+    global _identity_map
+    with _identity_map_lock:
+        if _identity_map is None:
+            try:
+                maxsize = int(os.environ.get(SIZE_ENV, DEFAULT_SIZE))
+            except ValueError:
+                print(f"环境变量 {SIZE_ENV} 无效，使用默认值 {DEFAULT_SIZE}")
+                maxsize = DEFAULT_SIZE
+            _identity_map = AssetIdentityMap(maxsize)
+        return _identity_map
+
+
+def reset_identity_map():
+    """结束当前会话的标识映射：清空并丢弃，下次 get_identity_map() 时创建新的映射"""
+    global _identity_map
+    with _identity_map_lock:
+        if _identity_map is not None:
+            _identity_map.close()
+            _identity_map = None
@@ -0,0 +1,397 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant, pyqtSignal
+from PyQt5.QtGui import QColor
+from bisect import bisect_right
+from models import change_events
+from models.asset import Asset, LISTING_USERS_COLUMN
+from ui.db_executor import get_executor
+
+class AssetTableModel(QAbstractTableModel):
+    """资产列表模型
+
+    行数据按页从数据库读取（键集分页）：视图滚动到底部时通过 canFetchMore/fetchMore 加载下一页，
+    点击表头排序时由数据库按该列排序后重新分页加载，
+    单元格的显示文本和颜色在绘制时才生成，不为每个单元格创建对象。
+    查询在后台线程中执行，结果返回后再更新模型，界面不会因查询而卡顿。
+    设置内存缓存（models.asset_cache.AssetCache）后，筛选和排序直接在缓存上完成，
+    模型只保存符合条件的行在缓存中的位置。
+    资产变更通知（models.change_events）到达后只重新读取变化的资产并更新对应的行。
+    """
+
+    # 第一页加载完成，参数为已加载的行数
+    loaded = pyqtSignal(int)
+    # 总数统计完成，参数为符合条件的资产总数
+    counted = pyqtSignal(int)
+    # 加载失败，参数为错误信息
+    loadFailed = pyqtSignal(str)
+    # 资产变更通知可能来自后台线程，通过信号转到界面线程处理
+    _assetsChanged = pyqtSignal(str, object)
+
+    HEADERS = [
+        "资产编号", "设备名称", "数量", "类目", "品牌规格",
+        "入库时间", "设备位置", "使用人", "维修状态", "备注"
+    ]
+    # 表格列对应的列表查询结果列
+    COLUMN_FIELDS = [1, 2, 3, 4, 5, 6, 8, LISTING_USERS_COLUMN, 10, 9]
+    # 表格列对应的排序列（None 表示不能排序）
+    COLUMN_SORT_KEYS = ["asset_id", "name", "quantity", "category", "brand_spec",
+                        "purchase_date", "location", None, "maintenance_status", None]
+    STATUS_COLUMN = 8
+    # 根据维修状态设置颜色
+    STATUS_COLORS = {
+        "正常": QColor(Qt.green),
+        "维修中": QColor(Qt.yellow),
+        "已报废": QColor(Qt.red),
+    }
+    PAGE_SIZE = 500
+    # 一次修改或添加的资产超过这个数量时直接重新加载，不逐行更新（删除总是逐行移除）
+    PATCH_LIMIT = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []  # 已加载的列表查询结果
+        self._filters = None
+        self._order_by = "asset_id"
+        self._descending = False
+        self._sort_column = None  # 点击表头选择的排序列，None 表示默认排序
+        self._sort_descending = False
+        self._cursor = None  # 下一页的分页游标，None 表示已加载全部数据
+        self._fetching = False  # 是否正在加载下一页
+        self._generation = 0  # 每次重新加载递增，用于丢弃过期的分页结果
+        self.cache = None  # 内存缓存，设置后 _rows 为缓存中的行位置
+        self._total = None  # 符合条件的资产总数，统计完成前为 None
+        self._cache_reset = False  # 缓存刷新完成后是否重置模型（有尚未完成的重新加载）
+        self.executor = get_executor()
+
+        listener = self._assetsChanged.emit
+        self._assetsChanged.connect(self._on_assets_changed)
+        change_events.add_listener(listener)
+        self.destroyed.connect(lambda: change_events.remove_listener(listener))
+
+    def set_cache(self, cache):
+        """改用内存缓存筛选（None 表示恢复按页查询数据库），并按当前条件重新加载"""
+        # 两种方式下 _rows 的含义不同（缓存中的行位置或列表行），切换时先清空，等待重新加载
+        self.beginResetModel()
+        self.cache = cache
+        self._rows = []
+        self.endResetModel()
+        self.load(self._filters)
+
+    def load(self, filters=None):
+        """按筛选条件在后台重新加载
+
+        先查询第一页并发出 loaded 信号，再单独统计总数并发出 counted 信号，
+        结果集很大时表格不必等待统计完成。新的加载会中断仍在执行的旧查询。
+        """
+        self._generation += 1
+        generation = self._generation
+        self._filters = filters
+        self._cursor = None
+        self._fetching = False
+        self._total = None
+        # 默认排序：关键字可以使用全文检索时按相关度排序，否则按资产编号排序
+        search_text = (filters or {}).get(Asset.SEARCH_FILTER)
+        if self._sort_column is not None:
+            self._order_by = self._sort_column
+            self._descending = self._sort_descending
+        else:
+            self._order_by = "rank" if Asset.can_rank(search_text) else "asset_id"
+            self._descending = False
+        if self.cache is not None:
+            self.executor.cancel_key(("assets-load", id(self)))
+            self.executor.cancel_key(("assets-page", id(self)))
+            self.executor.cancel_key(("assets-count", id(self)))
+            self._refresh_cache(reset=True)
+            return
+        self.executor.cancel_key(("cache-refresh", id(self)))
+        self._cache_reset = False
+        self.executor.cancel_key(("assets-page", id(self)))
+        self.executor.cancel_key(("assets-count", id(self)))
+        self.executor.submit(
+            Asset.get_assets_page, filters, None, self.PAGE_SIZE, self._order_by, self._descending,
+            key=("assets-load", id(self)), interruptible=True,
+            on_result=lambda result: self._on_loaded(generation, result),
+            on_error=self.loadFailed.emit,
+        )
+
+    def _refresh_cache(self, reset):
+        """在后台读取缓存上次刷新后变化的资产，完成后在界面线程中更新缓存并重新筛选排序
+
+        reset 为 True 时（重新加载）重置模型，否则保持选中的行。新的刷新会取消尚未完成的旧刷新，
+        被取消的刷新要求的重置由新的刷新完成。
+        """
+        self._cache_reset = self._cache_reset or reset
+        self.executor.submit(
+            self.cache.read_changes, self.cache.last_seq,
+            key=("cache-refresh", id(self)), interruptible=True,
+            on_result=self._on_cache_read, on_error=self._on_cache_failed,
+        )
+
+    def _on_cache_failed(self, message):
+        self._cache_reset = False
+        self.loadFailed.emit(message)
+
+    def _on_cache_read(self, changes):
+        reset, self._cache_reset = self._cache_reset, False
+        if reset:
+            self._load_from_cache(changes)
+        else:
+            self._update_from_cache(changes)
+
+    def _load_from_cache(self, changes):
+        """更新缓存后在缓存上筛选排序（缓存上没有相关度，默认按资产编号排序）"""
+        if self._order_by == "rank":
+            self._order_by = "asset_id"
+        try:
+            self.cache.apply_changes(changes)
+            positions = self.cache.sort(self.cache.filter(self._filters), self._order_by, self._descending)
+        except Exception as e:
+            self.loadFailed.emit(str(e))
+            return
+        self.beginResetModel()
+        self._rows = positions
+        self.endResetModel()
+        self._total = len(positions)
+        self.loaded.emit(len(positions))
+        self.counted.emit(len(positions))
+
+    def _update_from_cache(self, changes):
+        """资产变更后更新缓存并重新筛选排序
+
+        以布局变化代替重置模型，选中的行按数据库ID对应到新位置，批量操作后仍保持选中。
+        """
+        persistent = self.persistentIndexList()
+        old_ids = [int(self.cache.ids[self._rows[index.row()]]) for index in persistent]
+        try:
+            if not self.cache.apply_changes(changes):
+                return
+            positions = self.cache.sort(self.cache.filter(self._filters),
+                                        self._order_by, self._descending)
+        except Exception as e:
+            self.loadFailed.emit(str(e))
+            return
+        self.layoutAboutToBeChanged.emit()
+        self._rows = positions
+        new_rows = {int(asset_db_id): row for row, asset_db_id in enumerate(self.cache.ids[positions])}
+        self.changePersistentIndexList(persistent, [
+            self.index(new_rows[asset_db_id], index.column())
+            if asset_db_id in new_rows else QModelIndex()
+            for index, asset_db_id in zip(persistent, old_ids)
+        ])
+        self.layoutChanged.emit()
+        self._total = len(positions)
+        self.counted.emit(len(positions))
+
+    def _on_loaded(self, generation, result):
+        if generation != self._generation:
+            return
+        rows, cursor, _ = result
+        self.beginResetModel()
+        self._rows = rows
+        self._cursor = cursor
+        self.endResetModel()
+        self.loaded.emit(len(rows))
+
+        self._count(generation)
+
+    def _count(self, generation):
+        if self._cursor is None:
+            # 已加载全部数据，无需再统计
+            self._on_counted(generation, len(self._rows))
+        else:
+            self.executor.submit(
+                Asset.count_assets, self._filters,
+                key=("assets-count", id(self)), interruptible=True,
+                on_result=lambda total: self._on_counted(generation, total),
+            )
+
+    def _on_counted(self, generation, total):
+        if generation == self._generation:
+            self._total = total
+            self.counted.emit(total)
+
+    def _on_assets_changed(self, kind, ids):
+        """资产变更：重新读取变化的资产，只更新、插入或移除对应的行"""
+        if self.cache is not None:
+            # 缓存只增量读取变化的资产，重新筛选不查询其他资产
+            self._refresh_cache(reset=False)
+            return
+        generation = self._generation
+        if kind == change_events.DELETED:
+            # 删除不需要查询，任意数量都逐行移除
+            self._apply_changes(generation, ids, {})
+            return
+        if len(ids) > self.PATCH_LIMIT:
+            self.load(self._filters)
+            return
+        self.executor.submit(
+            Asset.get_listing_rows, ids, self._filters,
+            on_result=lambda rows: self._apply_changes(generation, ids, rows),
+            on_error=self.loadFailed.emit,
+        )
+
+    def _apply_changes(self, generation, ids, rows):
+        """rows 为变化的资产中仍符合筛选条件的列表行 {数据库ID: 行}"""
+        if generation != self._generation:
+            return
+        loaded = {record[0]: row for row, record in enumerate(self._rows)}
+        moved = []
+        for asset_db_id in ids:
+            row = loaded.get(asset_db_id)
+            record = rows.get(asset_db_id)
+            if row is None:
+                if record is not None:
+                    moved.append(record)
+            elif record is not None and self._sort_key(record) == self._sort_key(self._rows[row]):
+                self._rows[row] = record
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+            else:
+                # 不再符合条件，或排序位置改变（先移除再按新位置插入）
+                if record is not None:
+                    moved.append(record)
+                self._rows[row] = None
+
+        # 从后往前移除，相邻的行合并为一次移除
+        removed = [row for row, record in enumerate(self._rows) if record is None]
+        while removed:
+            last = first = removed.pop()
+            while removed and removed[-1] == first - 1:
+                first = removed.pop()
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._rows[first:last + 1]
+            self.endRemoveRows()
+        if moved:
+            keys = [self._sort_key(existing) for existing in self._rows]
+            for record in moved:
+                self._insert(record, keys)
+
+        # 已加载全部数据时行数即总数，否则重新统计
+        if self._total is not None:
+            self._count(generation)
+
+    def _sort_key(self, record):
+        """行在当前排序下的位置键（NULL 排在最前，与 SQLite 一致）"""
+        if self._order_by == "rank":
+            return (record[0],)
+        value = record[Asset.SORTABLE_COLUMN_INDEX[self._order_by]]
+        return (value is not None, value if value is not None else 0, record[0])
+
+    def _insert(self, record, keys):
+        """按排序位置插入一行；位置在已加载的行之后时留给后续分页加载
+
+        keys 为已加载各行的排序键，插入后随之更新。
+        """
+        key = self._sort_key(record)
+        if self._order_by == "rank":
+            # 相关度无法在本地计算，只在已加载全部数据时追加到末尾
+            row = len(self._rows)
+        else:
+            if self._descending:
+                row = next((i for i, existing in enumerate(keys) if existing < key), len(keys))
+            else:
+                row = bisect_right(keys, key)
+        if row == len(self._rows) and self._cursor is not None:
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.insert(row, record)
+        keys.insert(row, key)
+        self.endInsertRows()
+
+    def is_sortable(self, column):
+        return 0 <= column < len(self.COLUMN_SORT_KEYS) and self.COLUMN_SORT_KEYS[column] is not None
+
+    def sort_column(self):
+        """当前按哪一表格列排序，默认排序时为 -1"""
+        if self._sort_column is None:
+            return -1
+        return self.COLUMN_SORT_KEYS.index(self._sort_column)
+
+    def sort_order(self):
+        return Qt.DescendingOrder if self._sort_descending else Qt.AscendingOrder
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """按表格列排序：排序在数据库中完成（数量按整数、入库时间按日期），并重新分页加载"""
+        if not self.is_sortable(column):
+            return
+        self._sort_column = self.COLUMN_SORT_KEYS[column]
+        self._sort_descending = order == Qt.DescendingOrder
+        self.load(self._filters)
+
+    def asset_at(self, row):
+        """获取指定行的资产记录（列表查询结果）"""
+        if 0 <= row < len(self._rows):
+            return self._record(row)
+        return None
+
+    def _record(self, row):
+        if self.cache is not None:
+            return self.cache.row(self._rows[row])
+        return self._rows[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+
+        record = self._record(index.row())
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            value = record[self.COLUMN_FIELDS[column]]
+            return "" if value is None else str(value)
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignCenter)
+        if role == Qt.ForegroundRole and column == self.STATUS_COLUMN:
+            color = self.STATUS_COLORS.get(record[10])
+            return color if color is not None else QVariant()
+        if role == Qt.UserRole:
+            # 数据库ID（不显示，用于后续操作）
+            return record[0]
+        return QVariant()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return QVariant()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._cursor is not None and not self._fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        """在后台加载下一页"""
+        if parent.isValid() or self._cursor is None or self._fetching:
+            return
+
+        self._fetching = True
+        generation = self._generation
+        self.executor.submit(
+            Asset.get_assets_page, self._filters, self._cursor, self.PAGE_SIZE, self._order_by,
+            self._descending, key=("assets-page", id(self)), interruptible=True,
+            on_result=lambda result: self._on_page(generation, result),
+            on_error=self._on_page_failed,
+        )
+
+    def _on_page_failed(self, message):
+        self._fetching = False
+        self.loadFailed.emit(message)
+
+    def _on_page(self, generation, result):
+        if generation != self._generation:
+            return
+        self._fetching = False
+        page, self._cursor, _ = result
+        if page:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
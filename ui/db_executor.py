@@ -0,0 +1,186 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from database import get_manager
+import itertools
+import threading
+import traceback
+
+class TaskCancelled(Exception):
+    """任务已被取消（由进度回调抛出，用于中止导入、导出等长时间操作）"""
+
+
+class _Task(QRunnable):
+    """在线程池中执行的数据库任务"""
+
+    # 执行多少个 SQLite 虚拟机指令检查一次取消标志
+    INTERRUPT_CHECK_INTERVAL = 1000
+
+    def __init__(self, executor, request_id, func, args, kwargs, with_progress,
+                 interruptible=False):
+        super().__init__()
+        self.executor = executor
+        self.request_id = request_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.with_progress = with_progress
+        self.interruptible = interruptible
+        self.cancelled = threading.Event()
+
+    def _interrupt_requested(self):
+        # SQLite 进度回调：返回非零值时中断正在执行的查询
+        return 1 if self.cancelled.is_set() else 0
+
+    def report_progress(self, done, total):
+        """进度回调：发送进度信号，任务已取消时抛出 TaskCancelled"""
+        if self.cancelled.is_set():
+            raise TaskCancelled()
+        self.executor._progress.emit(self.request_id, done, total)
+
+    def run(self):
+        # 排队期间已被取消的任务不再执行
+        if self.cancelled.is_set():
+            return
+        conn = None
+        if self.interruptible:
+            # 取消后正在执行的查询立即中断，不必等它完成
+            conn = get_manager().connection()
+            conn.set_progress_handler(self._interrupt_requested, self.INTERRUPT_CHECK_INTERVAL)
+        try:
+            kwargs = dict(self.kwargs)
+            if self.with_progress:
+                kwargs["progress"] = self.report_progress
+            result = self.func(*self.args, **kwargs)
+        except TaskCancelled:
+            return
+        except Exception as e:
+            if self.cancelled.is_set():
+                return
+            traceback.print_exc()
+            self.executor._failed.emit(self.request_id, str(e))
+            return
+        finally:
+            if conn is not None:
+                conn.set_progress_handler(None, self.INTERRUPT_CHECK_INTERVAL)
+            # 工作线程执行完任务后线程局部数据会被清除，连接不能留到下一个任务，在这里释放
+            get_manager().release()
+        if not self.cancelled.is_set():
+            self.executor._finished.emit(self.request_id, result)
+
+
+class DbExecutor(QObject):
+    """数据库任务执行器
+
+    在后台线程池中执行数据库操作（每个任务使用连接管理器为工作线程打开的独立连接，任务结束时释放），
+    结果通过信号回到界面线程并调用提交时给出的回调。
+    提交时可以指定 key：同一 key 的新任务会取消尚未完成的旧任务，旧任务的结果被丢弃。
+    """
+
+    _finished = pyqtSignal(int, object)
+    _failed = pyqtSignal(int, str)
+    _progress = pyqtSignal(int, int, int)
+
+    def __init__(self, parent=None, max_threads=2):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        # 工作线程常驻，不必反复创建线程
+        self.pool.setExpiryTimeout(-1)
+        self._ids = itertools.count(1)
+        self._tasks = {}  # request_id -> (任务, key, 结果回调, 错误回调, 进度回调)
+        self._keys = {}  # key -> request_id
+        self._finished.connect(self._on_finished)
+        self._failed.connect(self._on_failed)
+        self._progress.connect(self._on_progress)
+
+    def submit(self, func, *args, on_result=None, on_error=None, on_progress=None,
+               key=None, interruptible=False, **kwargs):
+        """提交任务，返回请求ID
+
+        on_result(result) 和 on_error(message) 在界面线程中调用；
+        指定 on_progress(done, total) 时，func 会收到 progress 关键字参数，
+        func 应定期调用它报告进度，任务被取消时该调用会抛出 TaskCancelled。
+        interruptible 为 True 时，任务被取消会通过 SQLite 进度回调中断正在执行的查询，
+        只应用于只读任务（中断写语句会回滚整个事务）。
+        """
+        if key is not None:
+            self.cancel_key(key)
+
+        request_id = next(self._ids)
+        task = _Task(self, request_id, func, args, kwargs, on_progress is not None,
+                     interruptible)
+        self._tasks[request_id] = (task, key, on_result, on_error, on_progress)
+        if key is not None:
+            self._keys[key] = request_id
+        self.pool.start(task)
+        return request_id
+
+    def cancel(self, request_id):
+        """取消任务：未开始的任务不再执行，已开始的任务结果被丢弃"""
+        entry = self._tasks.pop(request_id, None)
+        if entry is None:
+            return False
+        task, key = entry[0], entry[1]
+        task.cancelled.set()
+        if key is not None and self._keys.get(key) == request_id:
+            del self._keys[key]
+        return True
+
+    def cancel_key(self, key):
+        """取消指定 key 下尚未完成的任务"""
+        request_id = self._keys.get(key)
+        if request_id is not None:
+            self.cancel(request_id)
+
+    def is_pending(self, request_id):
+        return request_id in self._tasks
+
+    def _pop(self, request_id):
+        entry = self._tasks.pop(request_id, None)
+        if entry is not None and entry[1] is not None and self._keys.get(entry[1]) == request_id:
+            del self._keys[entry[1]]
+        return entry
+
+    def _on_finished(self, request_id, result):
+        entry = self._pop(request_id)
+        if entry is not None and entry[2] is not None:
+            entry[2](result)
+
+    def _on_failed(self, request_id, message):
+        entry = self._pop(request_id)
+        if entry is None:
+            return
+        if entry[3] is not None:
+            entry[3](message)
+        else:
+            print(f"数据库任务错误: {message}")
+
+    def _on_progress(self, request_id, done, total):
+        entry = self._tasks.get(request_id)
+        if entry is not None and entry[4] is not None:
+            entry[4](done, total)
+
+    def shutdown(self):
+        """取消所有任务并等待工作线程结束当前任务"""
+        for request_id in list(self._tasks):
+            self.cancel(request_id)
+        self.pool.clear()
+        self.pool.waitForDone()
+
+
+_executor = None
+
+
+def get_executor():
+    """获取界面共用的数据库任务执行器（需在 QApplication 创建之后调用）"""
+    global _executor
+    if _executor is None:
+        _executor = DbExecutor()
+    return _executor
+
+
+def shutdown_executor():
+    """程序退出前调用"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
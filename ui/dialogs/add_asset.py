@@ -5,6 +5,8 @@ from PyQt5.QtWidgets import (QDialog, QFormLayout, QLineEdit, QPushButton,
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QPixmap, QFont
 from models.asset import Asset
+from models.identity_map import get_identity_map
+from ui.db_executor import get_executor
 import os
 import shutil
 
@@ -177,10 +179,26 @@ class AddAssetDialog(QDialog):
                 self.image_label.setText("")
     
     def load_asset_info(self, asset_id):
-        """加载资产信息到表单"""
-        self.asset = Asset(asset_id)
+        """在后台加载资产信息，完成后填入表单"""
+        self.save_button.setEnabled(False)
+        self.save_button.setText("加载中...")
+        get_executor().submit(
+            get_identity_map().get_by_asset_id, asset_id,
+            on_result=self.show_asset_info, on_error=self.on_load_failed
+        )
+    
+    def on_load_failed(self, message):
+        """资产信息加载失败"""
+        self.save_button.setText("保存")
+        QMessageBox.warning(self, "错误", f"加载资产信息失败: {message}")
+    
+    def show_asset_info(self, asset):
+        """把资产信息填入表单"""
+        self.asset = asset
+        self.save_button.setText("保存")
+        self.save_button.setEnabled(True)
         
-        if self.asset.id:
+        if self.asset and self.asset.id:
             self.asset_id_edit.setText(self.asset.asset_id)
             self.name_edit.setText(self.asset.name)
             self.quantity_spin.setValue(self.asset.quantity)
@@ -278,10 +296,25 @@ class AddAssetDialog(QDialog):
         if saved_image_path:
             self.asset.image_path = saved_image_path
         
-        # 保存资产
-        success, msg = self.asset.save(self.user_id)
+        # 在后台保存资产，导入等操作占用数据库时不阻塞界面
+        self.save_button.setEnabled(False)
+        self.save_button.setText("保存中...")
+        get_executor().submit(
+            self.asset.save, self.user_id,
+            on_result=self.on_save_done,
+            on_error=lambda message: self.on_save_done((False, f"保存失败: {message}"))
+        )
+    
+    def on_save_done(self, result):
+        """资产保存完成"""
+        success, msg = result
+        self.save_button.setText("保存")
+        self.save_button.setEnabled(True)
         if success:
             QMessageBox.information(self, "成功", msg)
             self.accept()
         else:
+            # 资产对象已按表单修改但未保存，不能继续留在标识映射中
+            if self.asset.id:
+                get_identity_map().invalidate([self.asset.id])
             QMessageBox.warning(self, "错误", msg)
@@ -4,7 +4,8 @@ from PyQt5.QtWidgets import (QDialog, QFormLayout, QLineEdit, QPushButton,
                             QHeaderView, QGroupBox, QScrollArea, QWidget)
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont
-from models.asset import Asset
+from models.identity_map import get_identity_map
+from ui.db_executor import get_executor
 
 class RepairRecordDialog(QDialog):
     def __init__(self, parent=None, asset_id=None, user_id=None):
@@ -14,7 +15,6 @@ class RepairRecordDialog(QDialog):
         self.asset = None
         self.init_ui()
         self.load_asset_info()
-        self.load_repair_records()
     
     def init_ui(self):
         self.setWindowTitle("资产维修记录")
@@ -62,10 +62,10 @@ class RepairRecordDialog(QDialog):
         add_layout.addRow("维修结果:", self.repair_result_edit)
         
         # 添加按钮
-        add_button = QPushButton("添加维修记录")
-        add_button.clicked.connect(self.add_repair_record)
-        add_button.setMinimumHeight(30)
-        add_layout.addRow("", add_button)
+        self.add_button = QPushButton("添加维修记录")
+        self.add_button.clicked.connect(self.add_repair_record)
+        self.add_button.setMinimumHeight(30)
+        add_layout.addRow("", self.add_button)
         
         add_group.setLayout(add_layout)
         main_layout.addWidget(add_group)
@@ -102,21 +102,29 @@ class RepairRecordDialog(QDialog):
         self.setLayout(main_layout)
     
     def load_asset_info(self):
-        """加载资产基本信息"""
+        """在后台加载资产基本信息及记录"""
         if self.asset_id:
-            self.asset = Asset()
-            self.asset.load_by_id(self.asset_id)
-            
-            if self.asset.id:
-                info_text = f"""
-                <table>
-                    <tr><td><b>资产编号:</b></td><td>{self.asset.asset_id}</td>
-                    <td><b>设备名称:</b></td><td>{self.asset.name}</td></tr>
-                    <tr><td><b>类目:</b></td><td>{self.asset.category}</td>
-                    <td><b>当前状态:</b></td><td>{self.asset.maintenance_status}</td></tr>
-                </table>
-                """
-                self.asset_info_label.setText(info_text)
+            self.asset_info_label.setText("正在加载资产信息...")
+            get_executor().submit(
+                get_identity_map().get_by_id, self.asset_id, preload=("repair_records",),
+                on_result=self.show_asset_info,
+                on_error=lambda message: self.asset_info_label.setText(f"加载资产信息失败: {message}")
+            )
+    
+    def show_asset_info(self, asset):
+        """显示资产基本信息及记录"""
+        self.asset = asset
+        if self.asset:
+            info_text = f"""
+            <table>
+                <tr><td><b>资产编号:</b></td><td>{self.asset.asset_id}</td>
+                <td><b>设备名称:</b></td><td>{self.asset.name}</td></tr>
+                <tr><td><b>类目:</b></td><td>{self.asset.category}</td>
+                <td><b>当前状态:</b></td><td>{self.asset.maintenance_status}</td></tr>
+            </table>
+            """
+            self.asset_info_label.setText(info_text)
+            self.load_repair_records()
     
     def load_repair_records(self):
         """加载维修记录"""
@@ -160,15 +168,31 @@ class RepairRecordDialog(QDialog):
             QMessageBox.warning(self, "警告", "故障原因不能为空")
             return
         
-        success = self.asset.add_repair_record(repair_date, fault_cause, repair_result, self.user_id)
-        
+        self.add_button.setEnabled(False)
+        get_executor().submit(
+            self._add_repair_record, self.asset, repair_date, fault_cause, repair_result,
+            self.user_id,
+            on_result=self.on_repair_record_added,
+            on_error=lambda message: self.on_repair_record_added(False, message)
+        )
+    
+    @staticmethod
+    def _add_repair_record(asset, repair_date, fault_cause, repair_result, user_id):
+        """在后台线程中添加维修记录并重新加载维修记录"""
+        success = asset.add_repair_record(repair_date, fault_cause, repair_result, user_id)
+        if success:
+            asset.load_repair_records()
+        return success
+    
+    def on_repair_record_added(self, success, message=""):
+        """维修记录添加完成"""
+        self.add_button.setEnabled(True)
         if success:
             QMessageBox.information(self, "成功", "维修记录添加成功")
             # 刷新记录列表
-            self.asset.load_repair_records()
             self.load_repair_records()
             # 清空表单
             self.fault_cause_edit.clear()
             self.repair_result_edit.clear()
         else:
-            QMessageBox.warning(self, "错误", "维修记录添加失败")
+            QMessageBox.warning(self, "错误", "维修记录添加失败" + (f": {message}" if message else ""))
@@ -4,7 +4,8 @@ from PyQt5.QtWidgets import (QDialog, QFormLayout, QLineEdit, QPushButton,
                             QHeaderView, QGroupBox, QGridLayout)
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont, QColor
-from models.asset import Asset
+from models.identity_map import get_identity_map
+from ui.db_executor import get_executor
 
 class AssetUserManagementDialog(QDialog):
     def __init__(self, parent=None, asset_id=None):
@@ -13,7 +14,6 @@ class AssetUserManagementDialog(QDialog):
         self.asset = None
         self.init_ui()
         self.load_asset_info()
-        self.load_user_records()
     
     def init_ui(self):
         self.setWindowTitle("资产使用人管理")
@@ -54,10 +54,10 @@ class AssetUserManagementDialog(QDialog):
         add_layout.addWidget(self.start_date_edit, 0, 3)
         
         # 添加按钮
-        add_button = QPushButton("添加使用人")
-        add_button.clicked.connect(self.add_user)
-        add_button.setMinimumHeight(30)
-        add_layout.addWidget(add_button, 0, 4)
+        self.add_button = QPushButton("添加使用人")
+        self.add_button.clicked.connect(self.add_user)
+        self.add_button.setMinimumHeight(30)
+        add_layout.addWidget(self.add_button, 0, 4)
         
         add_group.setLayout(add_layout)
         main_layout.addWidget(add_group)
@@ -93,21 +93,29 @@ class AssetUserManagementDialog(QDialog):
         self.setLayout(main_layout)
     
     def load_asset_info(self):
-        """加载资产基本信息"""
+        """在后台加载资产基本信息及记录"""
         if self.asset_id:
-            self.asset = Asset()
-            self.asset.load_by_id(self.asset_id)
-            
-            if self.asset.id:
-                info_text = f"""
-                <table>
-                    <tr><td><b>资产编号:</b></td><td>{self.asset.asset_id}</td>
-                    <td><b>设备名称:</b></td><td>{self.asset.name}</td></tr>
-                    <tr><td><b>类目:</b></td><td>{self.asset.category}</td>
-                    <td><b>位置:</b></td><td>{self.asset.location}</td></tr>
-                </table>
-                """
-                self.asset_info_label.setText(info_text)
+            self.asset_info_label.setText("正在加载资产信息...")
+            get_executor().submit(
+                get_identity_map().get_by_id, self.asset_id, preload=("users",),
+                on_result=self.show_asset_info,
+                on_error=lambda message: self.asset_info_label.setText(f"加载资产信息失败: {message}")
+            )
+    
+    def show_asset_info(self, asset):
+        """显示资产基本信息及记录"""
+        self.asset = asset
+        if self.asset:
+            info_text = f"""
+            <table>
+                <tr><td><b>资产编号:</b></td><td>{self.asset.asset_id}</td>
+                <td><b>设备名称:</b></td><td>{self.asset.name}</td></tr>
+                <tr><td><b>类目:</b></td><td>{self.asset.category}</td>
+                <td><b>位置:</b></td><td>{self.asset.location}</td></tr>
+            </table>
+            """
+            self.asset_info_label.setText(info_text)
+            self.load_user_records()
     
     def load_user_records(self):
         """加载使用人记录"""
@@ -165,24 +173,48 @@ class AssetUserManagementDialog(QDialog):
             QMessageBox.warning(self, "警告", "使用人姓名不能为空")
             return
         
-        success = self.asset.add_user(user_name, start_date)
-        
+        self.add_button.setEnabled(False)
+        get_executor().submit(
+            self._add_user, self.asset, user_name, start_date,
+            on_result=self.on_user_added,
+            on_error=lambda message: self.on_user_added(False, message)
+        )
+    
+    @staticmethod
+    def _add_user(asset, user_name, start_date):
+        """在后台线程中添加使用人并重新加载使用记录"""
+        success = asset.add_user(user_name, start_date)
+        if success:
+            asset.load_users()
+        return success
+    
+    def on_user_added(self, success, message=""):
+        """使用人添加完成"""
+        self.add_button.setEnabled(True)
         if success:
             QMessageBox.information(self, "成功", "使用人添加成功")
             # 刷新记录列表
-            self.asset.load_users()
             self.load_user_records()
             # 清空表单
             self.user_name_edit.clear()
         else:
-            QMessageBox.warning(self, "错误", "使用人添加失败")
+            QMessageBox.warning(self, "错误", "使用人添加失败" + (f": {message}" if message else ""))
     
     def end_use(self, record_id, row):
         """结束使用"""
         end_date = QDate.currentDate().toString("yyyy-MM-dd")
         
-        success = self.asset.update_user(record_id, end_date)
-        
+        end_button = self.records_table.cellWidget(row, 4)
+        if end_button:
+            end_button.setEnabled(False)
+        get_executor().submit(
+            self.asset.update_user, record_id, end_date,
+            on_result=lambda success: self.on_use_ended(success, row, end_date),
+            on_error=lambda message: self.on_use_ended(False, row, end_date, message)
+        )
+    
+    def on_use_ended(self, success, row, end_date, message=""):
+        """结束使用完成"""
         if success:
             # 更新表格显示
             item3 = QTableWidgetItem(end_date)
@@ -199,4 +231,7 @@ class AssetUserManagementDialog(QDialog):
             
             QMessageBox.information(self, "成功", "已记录结束使用时间")
         else:
-            QMessageBox.warning(self, "错误", "操作失败")
+            end_button = self.records_table.cellWidget(row, 4)
+            if end_button:
+                end_button.setEnabled(True)
+            QMessageBox.warning(self, "错误", "操作失败" + (f": {message}" if message else ""))
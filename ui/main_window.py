@@ -1,12 +1,19 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                            QPushButton, QTableWidget, QTableWidgetItem,
+                            QPushButton, QTableView, QAbstractItemView,
                             QHeaderView, QLabel, QLineEdit, QComboBox,
                             QMessageBox, QFileDialog, QAction, QMenuBar,
-                            QMenu, QStatusBar, QSplitter, QGroupBox, QFormLayout)
-from PyQt5.QtCore import Qt, QSize
+                            QMenu, QStatusBar, QSplitter, QGroupBox, QFormLayout,
+                            QProgressDialog, QInputDialog)
+from PyQt5.QtCore import Qt, QSize, QTimer, QDate
 from PyQt5.QtGui import QFont, QIcon, QPixmap
 from models.asset import Asset
+from models.asset_cache import AssetCache, cache_available
+from models import change_events
+from models.change_feed import ChangeFeed
+from models.identity_map import get_identity_map, reset_identity_map
 from models.user import User
+from ui.asset_table_model import AssetTableModel
+from ui.db_executor import get_executor
 from ui.dialogs.add_asset import AddAssetDialog
 from ui.dialogs.repair_record import RepairRecordDialog
 from ui.dialogs.user_management import AssetUserManagementDialog
@@ -14,11 +21,27 @@ from utils.import_export import ImportExport
 import os
 
 class MainWindow(QMainWindow):
+    SEARCH_DEBOUNCE_MS = 300  # 输入搜索关键字后等待的毫秒数
+    MEMORY_CACHE_ENV = "ASSET_MEMORY_CACHE"  # 设为 1 时在内存缓存上筛选资产
+    CHANGE_POLL_MS = 2000  # 检查其他程序实例修改的间隔（毫秒）
+    
     def __init__(self, user):
         super().__init__()
         self.user = user  # 当前登录用户
+        self.executor = get_executor()  # 后台数据库任务执行器
+        # 每次登录使用新的资产标识映射，不复用上一个会话加载的对象
+        reset_identity_map()
         self.init_ui()
         self.load_assets()
+        if os.environ.get(self.MEMORY_CACHE_ENV) == "1":
+            self.enable_memory_cache()
+        
+        # 定期同步其他程序实例对同一数据库的修改
+        self.change_feed = ChangeFeed()
+        self.change_timer = QTimer(self)
+        self.change_timer.setInterval(self.CHANGE_POLL_MS)
+        self.change_timer.timeout.connect(self.sync_changes)
+        self.change_timer.start()
     
     def init_ui(self):
         self.setWindowTitle(f"资产管理系统 - {self.user.username} ({self.user.role})")
@@ -48,8 +71,9 @@ class MainWindow(QMainWindow):
         
         # 搜索框
         self.search_edit = QLineEdit()
-        self.search_edit.setPlaceholderText("搜索资产编号、名称...")
+        self.search_edit.setPlaceholderText("搜索资产编号、名称、规格、位置、备注...")
         self.search_edit.returnPressed.connect(self.search_assets)
+        self.search_edit.textChanged.connect(self.on_search_text_changed)
         filter_layout.addWidget(self.search_edit)
         
         # 类目筛选
@@ -128,6 +152,26 @@ class MainWindow(QMainWindow):
         self.repair_button.setEnabled(False)
         button_layout.addWidget(self.repair_button)
         
+        # 批量操作按钮（对表格中选中的多行资产执行）
+        self.batch_button = QPushButton("批量操作")
+        self.batch_button.setMinimumHeight(35)
+        self.batch_button.setMinimumWidth(100)
+        self.batch_button.setEnabled(False)
+        batch_menu = QMenu(self.batch_button)
+        status_menu = batch_menu.addMenu("设置维修状态")
+        for status in Asset.STATUSES:
+            status_action = status_menu.addAction(status)
+            status_action.triggered.connect(
+                lambda checked, status=status: self.batch_set_status(status))
+        batch_menu.addAction("更改设备位置...").triggered.connect(self.batch_set_location)
+        batch_menu.addAction("结束当前使用").triggered.connect(self.batch_end_usage)
+        # 只有管理员可以删除
+        if self.user.role == 'admin':
+            batch_menu.addSeparator()
+            batch_menu.addAction("删除选中资产").triggered.connect(self.batch_delete)
+        self.batch_button.setMenu(batch_menu)
+        button_layout.addWidget(self.batch_button)
+        
         # 导入按钮
         import_button = QPushButton("导入资产")
         import_button.clicked.connect(self.import_assets)
@@ -144,22 +188,37 @@ class MainWindow(QMainWindow):
         
         main_layout.addLayout(button_layout)
         
-        # 资产表格
-        self.asset_table = QTableWidget()
-        self.asset_table.setColumnCount(10)
-        self.asset_table.setHorizontalHeaderLabels([
-            "资产编号", "设备名称", "数量", "类目", "品牌规格",
-            "入库时间", "设备位置", "使用人", "维修状态", "备注"
-        ])
+        # 资产表格（数据按页从数据库加载）
+        self.asset_model = AssetTableModel(self)
+        self.asset_model.loaded.connect(self.on_assets_loaded)
+        self.asset_model.counted.connect(self.on_assets_counted)
+        self.asset_model.loadFailed.connect(self.on_assets_load_failed)
+        self.asset_table = QTableView()
+        self.asset_table.setModel(self.asset_model)
         self.asset_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.asset_table.verticalHeader().setVisible(False)
-        self.asset_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.asset_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.asset_table.cellClicked.connect(self.on_cell_clicked)
+        self.asset_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.asset_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        # 按住 Ctrl/Shift 可选中多行进行批量操作
+        self.asset_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.asset_table.clicked.connect(self.on_cell_clicked)
+        self.asset_table.selectionModel().selectionChanged.connect(self.on_selection_changed)
+        # 点击表头在数据库中排序（默认按资产编号，不显示排序标记）
+        header = self.asset_table.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(-1, Qt.AscendingOrder)
+        header.sortIndicatorChanged.connect(self.on_sort_changed)
         self.asset_table.setMinimumHeight(500)
         
         main_layout.addWidget(self.asset_table)
         
+        # 输入搜索关键字时延迟一段时间再查询，连续输入只查询最后一次
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.search_assets)
+        
         # 状态栏
         self.statusBar = QStatusBar()
         self.setStatusBar(self.statusBar)
@@ -238,79 +297,198 @@ class MainWindow(QMainWindow):
         help_menu.addAction(about_action)
     
     def load_assets(self, filters=None):
-        """加载资产数据到表格"""
-        assets = Asset.get_all_assets(filters)
+        """加载资产数据到表格（后台查询，完成后更新状态栏）"""
+        self.statusBar.showMessage("正在加载资产...")
+        self.asset_model.load(filters)
+    
+    def enable_memory_cache(self):
+        """在后台把全部资产读入内存缓存，完成后表格改为在缓存上筛选"""
+        if not cache_available():
+            print("未安装 numpy，无法使用内存缓存")
+            return
+        cache = AssetCache()
+        self.executor.submit(
+            cache.load,
+            on_result=lambda _: self.asset_model.set_cache(cache),
+            on_error=lambda message: print(f"加载内存缓存失败: {message}"),
+        )
+    
+    def sync_changes(self):
+        """同步其他程序实例的修改：表格只重新读取变化的资产"""
+        try:
+            changes, complete = self.change_feed.poll()
+        except Exception as e:
+            print(f"检查资产变更错误: {e}")
+            return
+        if not complete:
+            # 无法确定哪些资产变化了：缓存的资产对象全部失效，表格整体重新加载
+            get_identity_map().clear()
+            self.load_assets(self.current_filters())
+            return
+        for kind, ids in changes.items():
+            change_events.notify(self.change_feed.db, kind, ids)
+    
+    def on_sort_changed(self, column, order):
+        """点击表头排序；不能排序的列恢复原来的排序标记"""
+        if self.asset_model.is_sortable(column):
+            self.statusBar.showMessage("正在加载资产...")
+            self.asset_model.sort(column, order)
+            return
+        header = self.asset_table.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(self.asset_model.sort_column(), self.asset_model.sort_order())
+        header.blockSignals(False)
+    
+    def on_assets_loaded(self, loaded_count):
+        """资产第一页加载完成"""
+        self.statusBar.showMessage(f"已加载 {loaded_count} 条资产记录，正在统计总数...")
+    
+    def on_assets_counted(self, total):
+        """资产总数统计完成"""
+        self.statusBar.showMessage(f"共 {total} 条资产记录")
+    
+    def on_assets_load_failed(self, message):
+        """资产加载失败"""
+        self.statusBar.showMessage(f"加载资产失败: {message}")
+    
+    def run_with_progress(self, title, func, *args, on_done=None, **kwargs):
+        """在后台执行耗时操作并显示可取消的进度对话框（kwargs 传给 func）"""
+        dialog = QProgressDialog(title, "取消", 0, 0, self)
+        dialog.setWindowTitle(title)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(0)
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        
+        def on_progress(done, total):
+            dialog.setMaximum(total)
+            dialog.setValue(done)
+        
+        def on_result(result):
+            dialog.close()
+            if on_done:
+                on_done(*result)
+        
+        def on_error(message):
+            dialog.close()
+            QMessageBox.warning(self, "错误", message)
+        
+        request_id = self.executor.submit(
+            func, *args,
+            on_result=on_result, on_error=on_error, on_progress=on_progress, **kwargs
+        )
         
-        self.asset_table.setRowCount(len(assets))
+        def on_canceled():
+            if self.executor.cancel(request_id):
+                self.statusBar.showMessage(f"{title}已取消")
         
-        for row, asset in enumerate(assets):
-            # 资产ID（数据库ID，不显示，用于后续操作）
-            asset_db_id = asset[0]
-            
-            # 资产编号
-            item0 = QTableWidgetItem(asset[1])
-            item0.setTextAlignment(Qt.AlignCenter)
-            item0.setData(Qt.UserRole, asset_db_id)  # 存储数据库ID
-            self.asset_table.setItem(row, 0, item0)
-            
-            # 设备名称
-            item1 = QTableWidgetItem(asset[2])
-            item1.setTextAlignment(Qt.AlignCenter)
-            self.asset_table.setItem(row, 1, item1)
-            
-            # 数量
-            item2 = QTableWidgetItem(str(asset[3]))
-            item2.setTextAlignment(Qt.AlignCenter)
-            self.asset_table.setItem(row, 2, item2)
-            
-            # 类目
-            item3 = QTableWidgetItem(asset[4])
-            item3.setTextAlignment(Qt.AlignCenter)
-            self.asset_table.setItem(row, 3, item3)
-            
-            # 品牌规格
-            item4 = QTableWidgetItem(asset[5])
-            item4.setTextAlignment(Qt.AlignCenter)
-            self.asset_table.setItem(row, 4, item4)
-            
-            # 入库时间
-            item5 = QTableWidgetItem(asset[6])
-            item5.setTextAlignment(Qt.AlignCenter)
-            self.asset_table.setItem(row, 5, item5)
-            
-            # 设备位置
-            item6 = QTableWidgetItem(asset[8])
-            item6.setTextAlignment(Qt.AlignCenter)
-            self.asset_table.setItem(row, 6, item6)
-            
-            # 使用人（需要查询）
-            asset_obj = Asset()
-            asset_obj.load_by_id(asset_db_id)
-            users_text = ", ".join([user[1] for user in asset_obj.users if not user[3]])  # 只显示当前使用人
-            item7 = QTableWidgetItem(users_text)
-            item7.setTextAlignment(Qt.AlignCenter)
-            self.asset_table.setItem(row, 7, item7)
-            
-            # 维修状态
-            item8 = QTableWidgetItem(asset[10])
-            item8.setTextAlignment(Qt.AlignCenter)
-            # 根据状态设置颜色
-            if asset[10] == "正常":
-                item8.setForeground(Qt.green)
-            elif asset[10] == "维修中":
-                item8.setForeground(Qt.yellow)
-            elif asset[10] == "已报废":
-                item8.setForeground(Qt.red)
-            self.asset_table.setItem(row, 8, item8)
-            
-            # 备注
-            item9 = QTableWidgetItem(asset[9])
-            item9.setTextAlignment(Qt.AlignCenter)
-            self.asset_table.setItem(row, 9, item9)
+        dialog.canceled.connect(on_canceled)
+        dialog.show()
+    
+    def selected_asset(self):
+        """获取当前选中行的资产记录，未选中时返回 None"""
+        selected_rows = self.asset_table.selectionModel().selectedRows()
+        if not selected_rows:
+            return None
+        # 列表行可能是一段时间之前读取的，不加入标识映射；对话框按数据库ID重新读取资产
+        return self.asset_model.asset_at(selected_rows[0].row())
+    
+    def selected_asset_ids(self):
+        """获取所有选中行的资产数据库ID"""
+        ids = []
+        for index in self.asset_table.selectionModel().selectedRows():
+            record = self.asset_model.asset_at(index.row())
+            if record is not None:
+                ids.append(record[0])
+        return ids
+    
+    def on_selection_changed(self, selected, deselected):
+        """选中行变化：有选中行时才能批量操作"""
+        count = len(self.asset_table.selectionModel().selectedRows())
+        self.batch_button.setEnabled(count > 0)
+        if count > 1:
+            self.statusBar.showMessage(f"已选中 {count} 条资产")
+    
+    def run_batch(self, title, func, *args):
+        """在后台对选中的资产执行批量操作（一个事务），完成后汇总结果
+        
+        表格根据操作提交后的一次资产变更通知增量更新，不重新加载。
+        """
+        asset_db_ids = self.selected_asset_ids()
+        if not asset_db_ids:
+            QMessageBox.warning(self, "警告", "请先选择资产")
+            return
+        self.batch_button.setEnabled(False)
+        self.statusBar.showMessage(f"正在{title}...")
+        
+        def on_result(outcomes):
+            self.batch_button.setEnabled(True)
+            self.on_batch_done(title, outcomes)
         
-        self.statusBar.showMessage(f"共加载 {len(assets)} 条资产记录")
+        def on_error(message):
+            self.batch_button.setEnabled(True)
+            QMessageBox.warning(self, "错误", f"{title}失败: {message}")
+        
+        self.executor.submit(func, asset_db_ids, *args, on_result=on_result, on_error=on_error)
+    
+    def on_batch_done(self, title, outcomes):
+        """批量操作完成：显示成功数量和失败原因"""
+        succeeded = sum(1 for ok, _ in outcomes if ok)
+        failures = {}
+        for ok, msg in outcomes:
+            if not ok:
+                failures[msg] = failures.get(msg, 0) + 1
+        self.statusBar.showMessage(f"{title}完成: 成功 {succeeded} 条")
+        if failures:
+            details = "\n".join(f"{msg}: {count} 条" for msg, count in failures.items())
+            QMessageBox.warning(
+                self, title, f"成功 {succeeded} 条，失败 {len(outcomes) - succeeded} 条\n{details}"
+            )
+    
+    def batch_set_status(self, status):
+        """批量设置选中资产的维修状态"""
+        self.run_batch("设置维修状态", Asset.bulk_set_status, status)
+    
+    def batch_set_location(self):
+        """批量更改选中资产的设备位置"""
+        count = len(self.selected_asset_ids())
+        if not count:
+            QMessageBox.warning(self, "警告", "请先选择资产")
+            return
+        location, ok = QInputDialog.getText(
+            self, "更改设备位置", f"将选中的 {count} 条资产移动到:"
+        )
+        if ok:
+            self.run_batch("更改设备位置", Asset.bulk_set_location, location.strip())
+    
+    def batch_end_usage(self):
+        """结束选中资产的当前使用（结束日期为今天）"""
+        count = len(self.selected_asset_ids())
+        if not count:
+            QMessageBox.warning(self, "警告", "请先选择资产")
+            return
+        reply = QMessageBox.question(
+            self, "确认结束使用", f"确定要结束选中的 {count} 条资产的当前使用吗？",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            end_date = QDate.currentDate().toString("yyyy-MM-dd")
+            self.run_batch("结束使用", Asset.bulk_end_usage, end_date)
+    
+    def batch_delete(self):
+        """批量删除选中的资产（仅管理员）"""
+        count = len(self.selected_asset_ids())
+        if not count:
+            QMessageBox.warning(self, "警告", "请先选择资产")
+            return
+        reply = QMessageBox.question(
+            self, "确认删除", f"确定要删除选中的 {count} 条资产吗？\n此操作不可恢复！",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self.run_batch("批量删除", Asset.bulk_delete)
     
-    def on_cell_clicked(self, row, column):
+    def on_cell_clicked(self, index):
         """表格单元格点击事件"""
         # 启用操作按钮
         self.edit_button.setEnabled(True)
@@ -320,34 +498,31 @@ class MainWindow(QMainWindow):
     
     def add_asset(self):
         """添加新资产"""
+        # 保存后表格根据资产变更通知自动更新
         dialog = AddAssetDialog(self, user_id=self.user.id)
-        if dialog.exec_():
-            self.load_assets()
+        dialog.exec_()
     
     def edit_asset(self):
         """编辑选中的资产"""
-        selected_rows = self.asset_table.selectionModel().selectedRows()
-        if not selected_rows:
+        record = self.selected_asset()
+        if not record:
             QMessageBox.warning(self, "警告", "请先选择要编辑的资产")
             return
         
         # 获取选中资产的编号
-        asset_id = self.asset_table.item(selected_rows[0].row(), 0).text()
+        asset_id = record[1]
         dialog = AddAssetDialog(self, asset_id=asset_id, user_id=self.user.id)
-        if dialog.exec_():
-            self.load_assets()
+        dialog.exec_()
     
     def delete_asset(self):
         """删除选中的资产"""
-        selected_rows = self.asset_table.selectionModel().selectedRows()
-        if not selected_rows:
+        record = self.selected_asset()
+        if not record:
             QMessageBox.warning(self, "警告", "请先选择要删除的资产")
             return
         
-        # 获取选中资产的数据库ID和编号
-        row = selected_rows[0].row()
-        asset_db_id = self.asset_table.item(row, 0).data(Qt.UserRole)
-        asset_id = self.asset_table.item(row, 0).text()
+        # 获取选中资产的编号
+        asset_id = record[1]
         
         # 确认删除
         reply = QMessageBox.question(
@@ -356,46 +531,49 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            asset = Asset()
-            asset.load_by_id(asset_db_id)
-            if asset.delete():
-                QMessageBox.information(self, "成功", "资产已删除")
-                self.load_assets()
-            else:
-                QMessageBox.warning(self, "错误", "删除失败")
+            # 删除只需要数据库ID，不必先加载资产；在后台执行，导入等操作占用数据库时不阻塞界面
+            asset = Asset.from_row(record)
+            self.executor.submit(
+                asset.delete,
+                on_result=self.on_asset_deleted,
+                on_error=lambda message: QMessageBox.warning(self, "错误", f"删除失败: {message}")
+            )
+    
+    def on_asset_deleted(self, success):
+        """资产删除完成"""
+        if success:
+            QMessageBox.information(self, "成功", "资产已删除")
+        else:
+            QMessageBox.warning(self, "错误", "删除失败")
     
     def manage_users(self):
         """管理资产使用人"""
-        selected_rows = self.asset_table.selectionModel().selectedRows()
-        if not selected_rows:
+        record = self.selected_asset()
+        if not record:
             QMessageBox.warning(self, "警告", "请先选择资产")
             return
         
         # 获取选中资产的数据库ID
-        asset_db_id = self.asset_table.item(selected_rows[0].row(), 0).data(Qt.UserRole)
+        asset_db_id = record[0]
         
         dialog = AssetUserManagementDialog(self, asset_id=asset_db_id)
         dialog.exec_()
-        # 刷新表格中的使用人信息
-        self.load_assets()
     
     def manage_repairs(self):
         """管理资产维修记录"""
-        selected_rows = self.asset_table.selectionModel().selectedRows()
-        if not selected_rows:
+        record = self.selected_asset()
+        if not record:
             QMessageBox.warning(self, "警告", "请先选择资产")
             return
         
         # 获取选中资产的数据库ID
-        asset_db_id = self.asset_table.item(selected_rows[0].row(), 0).data(Qt.UserRole)
+        asset_db_id = record[0]
         
         dialog = RepairRecordDialog(self, asset_id=asset_db_id, user_id=self.user.id)
         dialog.exec_()
-        # 刷新表格中的维修状态信息
-        self.load_assets()
     
-    def search_assets(self):
-        """搜索资产"""
+    def current_filters(self):
+        """根据搜索框和筛选下拉框生成筛选条件"""
         search_text = self.search_edit.text().strip()
         category = self.category_combo.currentText()
         status = self.status_combo.currentText()
@@ -403,7 +581,7 @@ class MainWindow(QMainWindow):
         filters = {}
         
         if search_text:
-            filters["(asset_id || name || brand_spec || location)"] = search_text
+            filters[Asset.SEARCH_FILTER] = search_text
         
         if category != "所有类目":
             filters["category"] = category
@@ -411,7 +589,16 @@ class MainWindow(QMainWindow):
         if status != "所有状态":
             filters["maintenance_status"] = status
         
-        self.load_assets(filters)
+        return filters
+    
+    def on_search_text_changed(self, text):
+        """搜索关键字变化：重新计时，停止输入后再搜索"""
+        self.search_timer.start()
+    
+    def search_assets(self):
+        """搜索资产（旧的查询会被取消）"""
+        self.search_timer.stop()
+        self.load_assets(self.current_filters())
     
     def filter_assets(self):
         """筛选资产"""
@@ -419,9 +606,16 @@ class MainWindow(QMainWindow):
     
     def reset_filters(self):
         """重置筛选条件"""
+        # 暂停信号，避免每个控件的变化各触发一次查询
+        widgets = (self.search_edit, self.category_combo, self.status_combo)
+        for widget in widgets:
+            widget.blockSignals(True)
         self.search_edit.clear()
         self.category_combo.setCurrentIndex(0)
         self.status_combo.setCurrentIndex(0)
+        for widget in widgets:
+            widget.blockSignals(False)
+        self.search_timer.stop()
         self.load_assets()
     
     def import_assets(self):
@@ -431,45 +625,63 @@ class MainWindow(QMainWindow):
         )
         
         if file_path:
-            success, msg = ImportExport.import_assets(file_path, self.user.id)
-            if success:
-                QMessageBox.information(self, "成功", msg)
-                self.load_assets()
+            # 资产编号已存在时的处理方式
+            box = QMessageBox(self)
+            box.setWindowTitle("导入方式")
+            box.setText("文件中的资产编号已存在时如何处理？")
+            merge_button = box.addButton("合并更新", QMessageBox.AcceptRole)
+            insert_button = box.addButton("只添加新资产", QMessageBox.AcceptRole)
+            box.addButton("取消", QMessageBox.RejectRole)
+            box.setDefaultButton(merge_button)
+            box.exec_()
+            if box.clickedButton() == merge_button:
+                mode = "merge"
+            elif box.clickedButton() == insert_button:
+                mode = "insert"
             else:
-                QMessageBox.warning(self, "错误", msg)
+                return
+            self.run_with_progress(
+                "导入资产", ImportExport.import_assets, file_path, self.user.id,
+                mode=mode, on_done=self.on_import_done
+            )
+    
+    def on_import_done(self, success, msg):
+        """导入完成"""
+        if success:
+            QMessageBox.information(self, "成功", msg)
+        else:
+            QMessageBox.warning(self, "错误", msg)
     
     def export_assets(self):
         """导出资产数据"""
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "保存Excel文件", "", "Excel文件 (*.xlsx)"
+        # 可选的导出格式（未安装 pyarrow 时没有 Parquet）
+        formats = ImportExport.export_formats()
+        name_filters = [f"{name} (*.{ext})" for _, ext, name in formats]
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "导出资产", "", ";;".join(name_filters)
         )
         
         if file_path:
-            # 确保文件扩展名正确
-            if not file_path.endswith(".xlsx"):
-                file_path += ".xlsx"
+            # 按选择的文件类型确定格式，并确保文件扩展名正确
+            file_format, ext, _ = formats[name_filters.index(selected_filter)] \
+                if selected_filter in name_filters else formats[0]
+            if not file_path.lower().endswith("." + ext):
+                file_path += "." + ext
             
             # 获取当前筛选条件
-            search_text = self.search_edit.text().strip()
-            category = self.category_combo.currentText()
-            status = self.status_combo.currentText()
-            
-            filters = {}
-            
-            if search_text:
-                filters["(asset_id || name || brand_spec || location)"] = search_text
+            filters = self.current_filters()
             
-            if category != "所有类目":
-                filters["category"] = category
-            
-            if status != "所有状态":
-                filters["maintenance_status"] = status
-            
-            success, msg = ImportExport.export_assets(file_path, filters)
-            if success:
-                QMessageBox.information(self, "成功", msg)
-            else:
-                QMessageBox.warning(self, "错误", msg)
+            self.run_with_progress(
+                "导出资产", ImportExport.export_assets, file_path, filters,
+                file_format=file_format, on_done=self.on_export_done
+            )
+    
+    def on_export_done(self, success, msg):
+        """导出完成"""
+        if success:
+            QMessageBox.information(self, "成功", msg)
+        else:
+            QMessageBox.warning(self, "错误", msg)
     
     def change_password(self):
         """更改密码"""
@@ -487,6 +699,12 @@ class MainWindow(QMainWindow):
         """退出登录"""
         self.close()
     
+    def closeEvent(self, event):
+        """关闭主窗口（退出登录）时结束会话：停止同步修改，丢弃资产标识映射"""
+        self.change_timer.stop()
+        reset_identity_map()
+        super().closeEvent(event)
+    
     def show_about(self):
         """显示关于信息"""
         QMessageBox.about(
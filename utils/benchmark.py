@@ -0,0 +1,286 @@
+"""性能基准测试
+
+在临时目录中创建独立的数据库，不会影响 data/assets.db。
+用法: python -m utils.benchmark [资产数量]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+def _use_temp_workdir():
+    """切换到临时目录，使 data/assets.db 指向全新的数据库，返回原工作目录和临时目录"""
+    previous = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="asset_bench_")
+    os.chdir(workdir)
+    return previous, workdir
+
+
+def _remove_temp_workdir(previous, workdir):
+    """关闭数据库连接，回到原工作目录并删除临时目录"""
+    from database import close_all_connections
+    close_all_connections()
+    os.chdir(previous)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+def seed(db, asset_count, users_per_asset=0, repairs_per_asset=0, start=0):
+    """批量生成测试资产及其使用记录、维修记录，返回新资产的数据库ID范围"""
+    categories = ["笔记本电脑", "鼠标", "键盘", "电脑显示屏", "手机"]
+    statuses = ["正常", "维修中", "已报废"]
+    db.executemany(
+        """INSERT INTO assets (asset_id, name, quantity, category, brand_spec,
+                               purchase_date, location, notes, maintenance_status)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        ((f"ZC{start + i:08d}", f"设备{start + i}", 1 + i % 5,
+          categories[i % len(categories)], f"品牌{i % 50} 型号{i % 7}",
+          f"20{10 + i % 15}-{1 + i % 12:02d}-{1 + i % 28:02d}",
+          f"{i % 30}楼{i % 12}室", "", statuses[i % len(statuses)])
+         for i in range(asset_count))
+    )
+    first_id = db.fetchone("SELECT id FROM assets WHERE asset_id = ?", (f"ZC{start:08d}",))[0]
+    ids = range(first_id, first_id + asset_count)
+
+    if users_per_asset:
+        # 每个资产只有最后一条使用记录未结束
+        db.executemany(
+            "INSERT INTO asset_users (asset_id, user_name, start_date, end_date) VALUES (?, ?, ?, ?)",
+            ((asset_db_id, f"员工{(asset_db_id + j) % 500}", "2020-01-01",
+              None if j == users_per_asset - 1 else "2021-01-01")
+             for asset_db_id in ids for j in range(users_per_asset))
+        )
+    if repairs_per_asset:
+        db.executemany(
+            """INSERT INTO repair_records (asset_id, repair_date, fault_cause, repair_result)
+               VALUES (?, ?, ?, ?)""",
+            ((asset_db_id, f"2022-{1 + j % 12:02d}-01", "无法开机", "已修复")
+             for asset_db_id in ids for j in range(repairs_per_asset))
+        )
+    return ids
+
+
+def _timed(func, *args, repeat=3):
+    """返回多次执行中的最短耗时（秒）和最后一次的结果"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_listing(asset_count=10000, history_sizes=(0, 10, 50)):
+    """资产列表加载耗时与历史记录数量的关系
+
+    每一轮在同一批资产上追加使用记录和维修记录，列表查询的耗时应基本不变。
+    """
+    from database import Database
+    from models.asset import Asset
+
+    db = Database()
+    db.execute("DELETE FROM assets")
+    ids = seed(db, asset_count)
+
+    results = []
+    added = 0
+    for history in history_sizes:
+        extra = history - added
+        if extra > 0:
+            db.executemany(
+                "INSERT INTO asset_users (asset_id, user_name, start_date, end_date) VALUES (?, ?, ?, ?)",
+                ((asset_db_id, f"员工{j}", "2020-01-01", "2021-01-01")
+                 for asset_db_id in ids for j in range(extra))
+            )
+            db.executemany(
+                "INSERT INTO repair_records (asset_id, repair_date, fault_cause, repair_result) VALUES (?, ?, ?, ?)",
+                ((asset_db_id, "2022-01-01", "无法开机", "已修复")
+                 for asset_db_id in ids for _ in range(extra))
+            )
+            added = history
+        elapsed, rows = _timed(Asset.list_assets)
+        results.append((history, len(rows), elapsed))
+    return results
+
+
+def bench_search(asset_count=100000, keywords=("设备12", "品牌7 型号3", "3楼")):
+    """关键字搜索耗时：第一页结果和总数"""
+    from database import Database
+    from models.asset import Asset
+
+    db = Database()
+    db.execute("DELETE FROM assets")
+    seed(db, asset_count)
+
+    results = []
+    for keyword in keywords:
+        filters = {Asset.SEARCH_FILTER: keyword}
+        order_by = "rank" if Asset.can_rank(keyword) else "asset_id"
+        elapsed, (rows, _, total) = _timed(
+            Asset.get_assets_page, filters, None, 500, order_by, False, True)
+        results.append((keyword, order_by, total, elapsed))
+    return results
+
+
+def bench_cache(asset_count=100000, filters_list=(
+        {"category": "鼠标", "maintenance_status": "正常"},
+        {"search": "设备12"},
+        {"search": "品牌7 型号3", "category": "键盘"})):
+    """内存缓存的加载耗时、内存占用和筛选排序耗时"""
+    from database import Database
+    from models.asset_cache import AssetCache
+
+    db = Database()
+    db.execute("DELETE FROM assets")
+    seed(db, asset_count)
+
+    cache = AssetCache()
+    load_elapsed, _ = _timed(cache.load, repeat=1)
+    results = []
+    for filters in filters_list:
+        elapsed, positions = _timed(lambda: cache.sort(cache.filter(filters), "asset_id"))
+        results.append((filters, len(positions), elapsed))
+    return load_elapsed, cache.memory_usage(), results
+
+
+def bench_export(asset_count=100000, users_per_asset=5, repairs_per_asset=5):
+    """各导出格式的耗时和文件大小，默认 10 万个资产、100 万条使用和维修记录"""
+    from database import Database
+    from utils.import_export import ImportExport
+
+    db = Database()
+    db.execute("DELETE FROM assets")
+    seed(db, asset_count, users_per_asset, repairs_per_asset)
+
+    results = []
+    for file_format, ext, _ in ImportExport.export_formats():
+        path = os.path.join("data", f"export_{file_format}.{ext}")
+        elapsed, (success, msg) = _timed(ImportExport.export_assets, path, None, None, file_format,
+                                         repeat=1)
+        if not success:
+            raise RuntimeError(msg)
+        results.append((file_format, elapsed, os.path.getsize(path)))
+    return results
+
+
+def bench_export_memory(asset_counts=(1000, 5000), users_per_asset=5, repairs_per_asset=5):
+    """Excel 流式导出的内存峰值（tracemalloc 统计），应不随资产数量增长
+
+    tracemalloc 会使导出慢十倍以上，因此只用较少的资产测量。
+    """
+    import tracemalloc
+    from database import Database
+    from utils.import_export import ImportExport
+
+    db = Database()
+    results = []
+    for asset_count in asset_counts:
+        db.execute("DELETE FROM assets")
+        seed(db, asset_count, users_per_asset, repairs_per_asset)
+        tracemalloc.start()
+        try:
+            ImportExport.export_assets(os.path.join("data", "export.xlsx"))
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        results.append((asset_count, peak))
+    return results
+
+
+def bench_import(asset_count=50000, users_per_asset=2, repairs_per_asset=1):
+    """Excel 导入耗时：先导出宽表，清空数据库后再导入，返回 (读取文件耗时, 导入总耗时, 导入结果)"""
+    import pandas as pd
+    from database import Database
+    from utils.import_export import ImportExport
+
+    db = Database()
+    db.execute("DELETE FROM assets")
+    seed(db, asset_count, users_per_asset, repairs_per_asset)
+    path = os.path.join("data", "import.xlsx")
+    ImportExport.export_assets(path)
+    db.execute("DELETE FROM assets")
+
+    read_elapsed, _ = _timed(pd.read_excel, path, repeat=1)
+    elapsed, (_, msg) = _timed(ImportExport.import_assets, path, None, repeat=1)
+    return read_elapsed, elapsed, msg.splitlines()[0]
+
+
+def bench_merge_import(asset_count=50000, users_per_asset=2, repairs_per_asset=1, changed=0.01):
+    """合并导入耗时：导出后修改 changed 比例资产的设备位置，再按合并方式导入
+
+    返回 [(说明, 耗时, 导入结果)]，依次为未修改的文件和修改过的文件。
+    """
+    import pandas as pd
+    from database import Database
+    from utils.import_export import ImportExport
+
+    db = Database()
+    db.execute("DELETE FROM assets")
+    seed(db, asset_count, users_per_asset, repairs_per_asset)
+    path = os.path.join("data", "merge.xlsx")
+    ImportExport.export_assets(path)
+
+    results = []
+    elapsed, (_, msg) = _timed(ImportExport.import_assets, path, None, None, "merge", repeat=1)
+    results.append(("未修改", elapsed, msg.splitlines()[0]))
+
+    df = pd.read_excel(path)
+    df.loc[:int(len(df) * changed) - 1, "设备位置"] = "合并测试"
+    df.to_excel(path, index=False)
+    elapsed, (_, msg) = _timed(ImportExport.import_assets, path, None, None, "merge", repeat=1)
+    results.append((f"修改 {changed:.0%}", elapsed, msg.splitlines()[0]))
+    return results
+
+
+def main(argv):
+    asset_count = int(argv[1]) if len(argv) > 1 else 10000
+    previous, workdir = _use_temp_workdir()
+    try:
+        _run(asset_count)
+    finally:
+        _remove_temp_workdir(previous, workdir)
+
+
+def _run(asset_count):
+
+    print(f"资产列表加载（{asset_count} 个资产）")
+    print(f"{'每个资产的历史记录':>12} {'行数':>8} {'耗时(ms)':>10}")
+    for history, rows, elapsed in bench_listing(asset_count):
+        print(f"{history * 2:>12} {rows:>8} {elapsed * 1000:>10.1f}")
+
+    print(f"\n关键字搜索（{asset_count} 个资产，第一页及总数）")
+    print(f"{'关键字':>12} {'方式':>8} {'匹配数':>8} {'耗时(ms)':>10}")
+    for keyword, order_by, total, elapsed in bench_search(asset_count):
+        method = "全文检索" if order_by == "rank" else "LIKE"
+        print(f"{keyword:>12} {method:>8} {total:>8} {elapsed * 1000:>10.1f}")
+
+    from models.asset_cache import cache_available
+    if cache_available():
+        load_elapsed, memory, results = bench_cache(asset_count)
+        print(f"\n内存缓存（{asset_count} 个资产，加载 {load_elapsed:.2f} 秒，"
+              f"约 {memory / 2 ** 20:.0f} MB）")
+        print(f"{'匹配数':>8} {'耗时(ms)':>10}  条件")
+        for filters, count, elapsed in results:
+            print(f"{count:>8} {elapsed * 1000:>10.1f}  {filters}")
+
+    print(f"\n导出（{asset_count} 个资产，每个资产 5 条使用记录和 5 条维修记录）")
+    print(f"{'格式':>12} {'耗时(秒)':>10} {'文件(MB)':>10}")
+    for file_format, elapsed, size in bench_export(asset_count):
+        print(f"{file_format:>12} {elapsed:>10.2f} {size / 2 ** 20:>10.1f}")
+    print("Excel 导出的内存峰值")
+    for count, peak in bench_export_memory():
+        print(f"{count:>8} 个资产  内存峰值 {peak / 2 ** 20:.1f} MB")
+
+    read_elapsed, elapsed, msg = bench_import(asset_count)
+    print(f"\nExcel 导入（{asset_count} 个资产，每个资产 2 条使用记录和 1 条维修记录）")
+    print(f"总耗时 {elapsed:.2f} 秒，其中读取文件约 {read_elapsed:.2f} 秒；{msg}")
+    print("按资产编号合并导入（同一文件再次导入）")
+    for label, elapsed, msg in bench_merge_import(asset_count):
+        print(f"{label:>8} {elapsed:>8.2f} 秒  {msg}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,165 @@
+import threading
+from database import Database
+from models.identity_map import AssetIdentityMap
+from models.asset import (Asset, LOAD_USERS_SQL, LOAD_REPAIR_RECORDS_SQL,
+                          CURRENT_USERS_SQL, LISTING_SQL)
+
+
+def _asset_filter_query(filters):
+    """与 Asset.get_all_assets 相同的筛选查询"""
+    where, params = Asset.build_filter(filters)
+    return "SELECT * FROM assets" + where + " ORDER BY asset_id", tuple(params)
+
+
+def _sorted_page_query(order_by, cursor=None):
+    """与 Asset.get_assets_page 相同的排序查询（cursor 不为 None 时为之后各页的最后一个非 NULL 段）"""
+    column = Asset.SORTABLE_COLUMNS[order_by]
+    seek, params = Asset._page_segments(column, cursor, False)[-1]
+    where = " WHERE " + seek if seek else ""
+    return LISTING_SQL + where + f" ORDER BY {column}, assets.id LIMIT 500", tuple(params)
+
+
+# 需要检查的模型查询：(名称, SQL, 参数, 应使用的索引)
+QUERY_PLAN_CHECKS = [
+    ("使用人记录", LOAD_USERS_SQL, (1,), "idx_asset_users_asset"),
+    ("当前使用人", CURRENT_USERS_SQL, (1,), "idx_asset_users_current"),
+    ("维修记录", LOAD_REPAIR_RECORDS_SQL, (1,), "idx_repair_records_asset_date"),
+    ("资产列表", LISTING_SQL + " ORDER BY asset_id", (), "idx_asset_users_current"),
+    ("类目筛选", *_asset_filter_query({"category": "鼠标"}), "idx_assets_category"),
+    ("状态筛选", *_asset_filter_query({"maintenance_status": "维修中"}), "idx_assets_status"),
+]
+
+# 表头排序的第一页：应按索引顺序读取，不应使用临时排序
+SORT_INDEXES = (
+    ("asset_id", "sqlite_autoindex_assets_1"),
+    ("name", "idx_assets_name"),
+    ("quantity", "idx_assets_quantity"),
+    ("category", "idx_assets_category"),
+    ("brand_spec", "idx_assets_brand_spec"),
+    ("purchase_date", "idx_assets_purchase_date"),
+    ("location", "idx_assets_location"),
+    ("maintenance_status", "idx_assets_status"),
+)
+SORT_PLAN_CHECKS = [
+    (f"按{order_by}排序", *_sorted_page_query(order_by), index)
+    for order_by, index in SORT_INDEXES
+]
+# 之后各页应从游标位置开始读索引（计划中出现 排序列>?），而不是从索引开头扫描
+SORT_PLAN_CHECKS += [
+    (f"按{order_by}排序（第二页）", *_sorted_page_query(order_by, ("x", 1)),
+     f"{index} ({Asset.SORTABLE_COLUMNS[order_by]}>?)")
+    for order_by, index in SORT_INDEXES
+]
+
+
+def explain_query_plan(db, query, params=()):
+    """返回查询执行计划的明细文本列表"""
+    return [row[3] for row in db.fetchall("EXPLAIN QUERY PLAN " + query, params)]
+
+
+def check_query_plans(db=None, checks=None):
+    """检查模型查询是否使用了预期的索引
+
+    返回 (名称, 是否通过, 执行计划) 列表。除了要求计划中出现预期索引，
+    还要求不出现全表扫描（SCAN 表名），维修记录和表头排序查询不应使用临时排序。
+    """
+    db = db or Database()
+    if checks is None:
+        checks = QUERY_PLAN_CHECKS + SORT_PLAN_CHECKS
+        if Asset.fulltext_available():
+            checks.append(("关键字搜索", *_asset_filter_query({Asset.SEARCH_FILTER: "打印机"}),
+                           "assets_fts"))
+    results = []
+    for name, query, params, index in checks:
+        plan = explain_query_plan(db, query, params)
+        uses_index = any(index in line for line in plan)
+        full_scan = any(line.startswith("SCAN ") and "INDEX" not in line for line in plan)
+        temp_sort = any("USE TEMP B-TREE" in line for line in plan)
+        ok = uses_index and not full_scan
+        if query is LOAD_REPAIR_RECORDS_SQL or any(query is check[1] for check in SORT_PLAN_CHECKS):
+            ok = ok and not temp_sort
+        results.append((name, ok, plan))
+    return results
+
+
+def check_executemany(timeout=10):
+    """检查 Database.executemany 的出错处理
+
+    出错的行应单独记为失败、其余行照常写入；语句本身无法执行时应把所有行记为失败并立即返回。
+    在后台线程连接的临时表上执行，不修改数据库内容，超过 timeout 秒未返回视为失败。
+    返回 (名称, 是否通过, 说明) 列表。
+    """
+    results = []
+
+    def run():
+        db = Database()
+        try:
+            db.execute("CREATE TEMP TABLE executemany_check (id INTEGER PRIMARY KEY, value TEXT NOT NULL)")
+            count, errors = db.executemany("INSERT INTO executemany_check VALUES (?, ?)",
+                                           [(1, "a"), (2, None), (3, "c")])
+            failed = [index for index, _ in errors]
+            results.append(("executemany 单行出错", count == 2 and failed == [1],
+                            [f"成功 {count} 行，出错的行 {failed}"]))
+            count, errors = db.executemany("INSERT INTO executemany_missing_table VALUES (?)",
+                                           [(1,), (2,)])
+            failed = [index for index, _ in errors]
+            results.append(("executemany 语句无法执行", count == 0 and failed == [0, 1],
+                            [f"成功 {count} 行，出错的行 {failed}"]))
+        finally:
+            db.manager.release()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        results.append(("executemany", False, [f"{timeout} 秒内没有返回"]))
+    return results
+
+
+def check_quantities(db=None):
+    """检查数量是否都是整数：第 5 版迁移不修改无法无损转换的数量，需要用户手动更正
+
+    返回 (名称, 是否通过, 说明) 列表，说明中列出前 20 个数量无效的资产。
+    """
+    db = db or Database()
+    rows = db.fetchall("SELECT asset_id, quantity FROM assets "
+                       "WHERE typeof(quantity) NOT IN ('integer', 'null') ORDER BY asset_id")
+    details = [f"{asset_id}: {quantity!r}" for asset_id, quantity in rows[:20]]
+    if len(rows) > 20:
+        details.append(f"…… 共 {len(rows)} 个")
+    return [("数量格式", not rows, details)]
+
+
+def check_identity_map(db=None):
+    """检查资产标识映射：再次获取同一资产应命中并返回同一对象，失效后应重新读取
+
+    使用单独的映射对象（不影响界面会话的映射），数据库中没有资产时跳过。
+    返回 (名称, 是否通过, 说明) 列表，说明中列出映射的统计信息（AssetIdentityMap.stats）。
+    """
+    db = db or Database()
+    row = db.fetchone("SELECT id FROM assets ORDER BY id LIMIT 1")
+    if row is None:
+        return [("资产标识映射", True, ["数据库中没有资产，未检查"])]
+    identity_map = AssetIdentityMap(8)
+    try:
+        first = identity_map.get_by_id(row[0])
+        same = identity_map.get_by_id(row[0]) is first
+        identity_map.invalidate([row[0]])
+        reloaded = identity_map.get_by_id(row[0]) is not first
+        stats = identity_map.stats()
+    finally:
+        identity_map.close()
+    ok = same and reloaded and stats["hits"] == 1 and stats["misses"] == 2
+    return [("资产标识映射", ok, [f"{name}: {value}" for name, value in stats.items()])]
+
+
+if __name__ == "__main__":
+    # 输出各查询的执行计划、批量写入、数量格式及标识映射检查结果：python -m utils.diagnostics
+    failed = 0
+    for name, ok, details in (check_query_plans() + check_executemany() + check_quantities()
+                              + check_identity_map()):
+        print(f"[{'通过' if ok else '失败'}] {name}")
+        for line in details:
+            print(f"    {line}")
+        failed += 0 if ok else 1
+    raise SystemExit(1 if failed else 0)
@@ -1,140 +1,589 @@
 import pandas as pd
 import os
+import csv
+import hashlib
+import json
+from collections import Counter
+from openpyxl import Workbook
 from datetime import datetime
-from models.asset import Asset
+from models.asset import Asset, LISTING_ID_BATCH
 from database import Database
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet 导出是可选功能
+    pa = None
+    pq = None
+
+
+def _date_text(value):
+    """Excel 中的日期单元格读出为 Timestamp，统一保存为 YYYY-MM-DD 以便按日期排序"""
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
 class ImportExport:
+    # 导出的资产基础列及对应的列表查询结果列
+    ASSET_COLUMNS = [
+        ("资产编号", 1), ("设备名称", 2), ("数量", 3), ("类目", 4), ("品牌规格", 5),
+        ("入库时间", 6), ("设备位置", 8), ("维修状态", 10), ("备注", 9),
+    ]
+    # 每条使用记录、维修记录占用的列（列名后加序号）
+    USER_COLUMNS = ["使用人", "使用开始时间", "使用结束时间"]
+    REPAIR_COLUMNS = ["维修时间", "故障原因", "维修结果"]
+
+    # 导出时每次读取的资产数（同时按这些资产读取使用记录和维修记录）
+    EXPORT_PAGE_SIZE = 1000
+
     @staticmethod
-    def export_assets(file_path, filters=None):
-        """导出资产数据到Excel文件"""
-        try:
-            # 获取所有资产
-            assets = Asset.get_all_assets(filters)
-            
-            # 准备导出数据
-            data = []
+    def _history_width(db, table, where, params):
+        """符合条件的资产中单个资产最多有多少条历史记录（查询出错时抛出异常，不按 0 列导出）"""
+        return next(db.iterate(f"""
+            SELECT COALESCE(MAX(n), 0) FROM (
+                SELECT COUNT(*) AS n FROM {table}
+                 WHERE asset_id IN (SELECT id FROM assets{where}) GROUP BY asset_id)""", params))[0]
+
+    @staticmethod
+    def _history_by_asset(db, query, asset_db_ids):
+        """读取一页资产的历史记录，按资产数据库ID分组（query 的第一列为资产数据库ID）
+
+        ID 按 LISTING_ID_BATCH 分批放入 IN 列表（旧版 SQLite 每条语句最多 999 个参数）。
+        """
+        grouped = {}
+        for start in range(0, len(asset_db_ids), LISTING_ID_BATCH):
+            batch = asset_db_ids[start:start + LISTING_ID_BATCH]
+            for row in db.iterate(query.format(ids=", ".join("?" * len(batch))), batch):
+                grouped.setdefault(row[0], []).append(row[1:])
+        return grouped
+
+    @staticmethod
+    def export_rows(filters=None, progress=None):
+        """逐页读取导出的数据，返回 (列名, 数据行迭代器)
+
+        基础列之后依次为 使用人1、使用开始时间1、使用结束时间1……和 维修时间1、故障原因1、维修结果1……，
+        列数由记录最多的资产决定。资产按页读取，每页的使用记录和维修记录按资产ID分批集合查询，
+        内存占用只与页大小有关。
+        progress(已处理数, 总数) 用于报告进度，可以通过抛出异常中止导出。
+        应在 Database.read_transaction() 中调用并读完所有行，否则其他连接在读取期间添加的
+        历史记录会使某些行比列名更长。
+        """
+        db = Database()
+        where, params = Asset.build_filter(filters)
+        max_users = ImportExport._history_width(db, "asset_users", where, params)
+        max_repairs = ImportExport._history_width(db, "repair_records", where, params)
+
+        columns = [name for name, _ in ImportExport.ASSET_COLUMNS]
+        columns += [f"{name}{i}" for i in range(1, max_users + 1) for name in ImportExport.USER_COLUMNS]
+        columns += [f"{name}{i}" for i in range(1, max_repairs + 1) for name in ImportExport.REPAIR_COLUMNS]
+        return columns, ImportExport._iter_export_rows(db, filters, max_users, max_repairs, progress)
+
+    @staticmethod
+    def _iter_export_rows(db, filters, max_users, max_repairs, progress):
+        total = Asset.count_assets(filters) if progress else 0
+        user_width = max_users * len(ImportExport.USER_COLUMNS)
+        repair_width = max_repairs * len(ImportExport.REPAIR_COLUMNS)
+        fields = [index for _, index in ImportExport.ASSET_COLUMNS]
+
+        done = 0
+        cursor = None
+        while True:
+            if progress:
+                progress(done, total)
+            assets, cursor, _ = Asset.get_assets_page(
+                filters, cursor, ImportExport.EXPORT_PAGE_SIZE, "asset_id")
+            if not assets:
+                break
+            asset_db_ids = [asset[0] for asset in assets]
+            users = ImportExport._history_by_asset(db, """
+                SELECT asset_id, user_name, start_date, COALESCE(end_date, '') FROM asset_users
+                 WHERE asset_id IN ({ids}) ORDER BY asset_id, id""", asset_db_ids) if max_users else {}
+            repairs = ImportExport._history_by_asset(db, """
+                SELECT asset_id, repair_date, fault_cause, repair_result FROM repair_records
+                 WHERE asset_id IN ({ids}) ORDER BY asset_id, id""", asset_db_ids) if max_repairs else {}
             for asset in assets:
-                # 资产基础信息
-                asset_info = {
-                    "资产编号": asset[1],
-                    "设备名称": asset[2],
-                    "数量": asset[3],
-                    "类目": asset[4],
-                    "品牌规格": asset[5],
-                    "入库时间": asset[6],
-                    "设备位置": asset[8],
-                    "维修状态": asset[10],
-                    "备注": asset[9]
-                }
-                
-                # 获取使用人信息
-                db = Database()
-                users = db.fetchall(
-                    "SELECT user_name, start_date, end_date FROM asset_users WHERE asset_id = ?",
-                    (asset[0],)
-                )
-                
-                # 添加使用人信息
-                for i, user in enumerate(users, 1):
-                    asset_info[f"使用人{i}"] = user[0]
-                    asset_info[f"使用开始时间{i}"] = user[1]
-                    asset_info[f"使用结束时间{i}"] = user[2] if user[2] else ""
-                
-                # 获取维修记录
-                repairs = db.fetchall(
-                    """SELECT repair_date, fault_cause, repair_result 
-                       FROM repair_records WHERE asset_id = ?""",
-                    (asset[0],)
-                )
-                
-                # 添加维修记录
-                for i, repair in enumerate(repairs, 1):
-                    asset_info[f"维修时间{i}"] = repair[0]
-                    asset_info[f"故障原因{i}"] = repair[1]
-                    asset_info[f"维修结果{i}"] = repair[2]
-                
-                data.append(asset_info)
-            
-            # 创建DataFrame并导出到Excel
-            df = pd.DataFrame(data)
-            df.to_excel(file_path, index=False)
+                row = [asset[index] for index in fields]
+                user_values = [value for record in users.get(asset[0], ()) for value in record]
+                repair_values = [value for record in repairs.get(asset[0], ()) for value in record]
+                row += user_values + [None] * (user_width - len(user_values))
+                row += repair_values + [None] * (repair_width - len(repair_values))
+                yield row
+            done += len(assets)
+            if cursor is None:
+                break
+        if progress:
+            progress(done, total)
+
+    # 导出格式 -> (扩展名, 文件类型名称)，同一扩展名的第一个格式为按扩展名选择时的默认格式
+    EXPORT_FORMATS = {
+        "xlsx": ("xlsx", "Excel文件"),
+        "xlsx_sheets": ("xlsx", "Excel文件（资产、使用记录、维修记录分表）"),
+        "csv": ("csv", "CSV文件"),
+        "jsonl": ("jsonl", "JSON Lines文件"),
+        "parquet": ("parquet", "Parquet文件"),
+    }
+    # Parquet 每批写入的行数
+    PARQUET_BATCH_SIZE = 10000
+    # 分表导出的工作表名称及各表的列
+    ASSET_SHEET = "资产"
+    USER_SHEET = "使用记录"
+    REPAIR_SHEET = "维修记录"
+    SHEET_KEY_COLUMN = "资产编号"
+
+    @staticmethod
+    def parquet_available():
+        """是否安装了 pyarrow，可以导出 Parquet"""
+        return pa is not None
+
+    @staticmethod
+    def export_formats():
+        """当前环境可用的导出格式 [(格式, 扩展名, 文件类型名称)]，第一个为默认格式"""
+        return [(file_format, ext, name)
+                for file_format, (ext, name) in ImportExport.EXPORT_FORMATS.items()
+                if file_format != "parquet" or ImportExport.parquet_available()]
+
+    @staticmethod
+    def export_assets(file_path, filters=None, progress=None, file_format=None):
+        """导出资产数据
+        
+        file_format 为 EXPORT_FORMATS 中的格式，未指定时按文件扩展名选择，默认 xlsx。
+        所有格式都边读取边写入，内存占用不随资产数量增长；先写入临时文件，完成后再替换目标文件。
+        progress(已处理数, 总数) 用于报告进度，可以通过抛出异常中止导出（不会留下不完整的文件）。
+        所有查询在一个只读事务中执行，导出的是开始导出时的同一个快照。
+        """
+        if file_format is None:
+            ext = os.path.splitext(file_path)[1].lstrip(".").lower() or "xlsx"
+            file_format = next((name for name, (format_ext, _) in ImportExport.EXPORT_FORMATS.items()
+                                if format_ext == ext), ext)
+        writers = {
+            "xlsx": ImportExport._write_xlsx,
+            "csv": ImportExport._write_csv,
+            "jsonl": ImportExport._write_jsonl,
+            "parquet": ImportExport._write_parquet,
+        }
+        if file_format not in writers and file_format != "xlsx_sheets":
+            return False, f"不支持的导出格式: {file_format}"
+        if file_format == "parquet" and not ImportExport.parquet_available():
+            return False, "导出 Parquet 需要安装 pyarrow"
+        
+        temp_path = file_path + ".part"
+        try:
+            with Database().read_transaction():
+                if file_format == "xlsx_sheets":
+                    ImportExport._write_xlsx_sheets(temp_path, filters, progress)
+                else:
+                    columns, rows = ImportExport.export_rows(filters, progress)
+                    writers[file_format](temp_path, columns, rows)
+            os.replace(temp_path, file_path)
             return True, "导出成功"
         except Exception as e:
             return False, f"导出失败: {str(e)}"
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    @staticmethod
+    def _write_xlsx_sheets(file_path, filters, progress):
+        """分表导出：资产、使用记录、维修记录各一个工作表，历史记录以资产编号关联
+
+        每条记录只占一行，文件大小只与记录数量有关，不受单个资产历史记录数量的影响。
+        三个表依次逐行写入，progress 按三个表的总行数报告进度。
+        """
+        db = Database()
+        where, params = Asset.build_filter(filters)
+        history = {
+            ImportExport.USER_SHEET: ("asset_users", ImportExport.USER_COLUMNS, """
+                SELECT assets.asset_id, asset_users.user_name, asset_users.start_date,
+                       asset_users.end_date
+                  FROM asset_users JOIN assets ON assets.id = asset_users.asset_id
+                 WHERE asset_users.asset_id IN (SELECT id FROM assets{where})
+                 ORDER BY asset_users.asset_id, asset_users.id"""),
+            ImportExport.REPAIR_SHEET: ("repair_records", ImportExport.REPAIR_COLUMNS, """
+                SELECT assets.asset_id, repair_records.repair_date, repair_records.fault_cause,
+                       repair_records.repair_result
+                  FROM repair_records JOIN assets ON assets.id = repair_records.asset_id
+                 WHERE repair_records.asset_id IN (SELECT id FROM assets{where})
+                 ORDER BY repair_records.asset_id, repair_records.id"""),
+        }
+        total = 0
+        if progress:
+            total = Asset.count_assets(filters) + sum(
+                db.fetchone(f"SELECT COUNT(*) FROM {table} "
+                            f"WHERE asset_id IN (SELECT id FROM assets{where})", params)[0]
+                for table, _, _ in history.values())
+        
+        workbook = Workbook(write_only=True)
+        sheets = []
+        try:
+            sheet = workbook.create_sheet(ImportExport.ASSET_SHEET)
+            sheets.append(sheet)
+            sheet.append([name for name, _ in ImportExport.ASSET_COLUMNS])
+            fields = [index for _, index in ImportExport.ASSET_COLUMNS]
+            done = 0
+            for asset in Asset.iter_assets(filters, ImportExport.EXPORT_PAGE_SIZE):
+                if progress and done % ImportExport.EXPORT_PAGE_SIZE == 0:
+                    progress(done, total)
+                sheet.append([asset[index] for index in fields])
+                done += 1
+            
+            for title, (_, columns, query) in history.items():
+                sheet = workbook.create_sheet(title)
+                sheets.append(sheet)
+                sheet.append([ImportExport.SHEET_KEY_COLUMN] + columns)
+                for row in db.iterate(query.format(where=where), params):
+                    if progress and done % ImportExport.EXPORT_PAGE_SIZE == 0:
+                        progress(done, total)
+                    sheet.append(row)
+                    done += 1
+            if progress:
+                progress(done, total)
+        except BaseException:
+            ImportExport._discard_sheets(sheets)
+            raise
+        workbook.save(file_path)
+    
+    @staticmethod
+    def _discard_sheets(sheets):
+        """中止时关闭只写工作表并删除 openpyxl 已写入的临时文件"""
+        for sheet in sheets:
+            sheet.close()
+            sheet._writer.cleanup()
+    
+    @staticmethod
+    def _write_xlsx(file_path, columns, rows):
+        """使用 openpyxl 的只写模式逐行写入 Excel"""
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Sheet1")
+        try:
+            sheet.append(columns)
+            for row in rows:
+                sheet.append(row)
+        except BaseException:
+            ImportExport._discard_sheets([sheet])
+            raise
+        workbook.save(file_path)
+    
+    @staticmethod
+    def _write_csv(file_path, columns, rows):
+        """写入 CSV（带 BOM 的 UTF-8，Excel 可直接打开中文）"""
+        with open(file_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(rows)
+    
+    @staticmethod
+    def _write_jsonl(file_path, columns, rows):
+        """每个资产写一行 JSON 对象，省略空值的列"""
+        with open(file_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                record = {column: value for column, value in zip(columns, row) if value is not None}
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write("\n")
+    
+    @staticmethod
+    def _write_parquet(file_path, columns, rows):
+        """按批写入 Parquet：数量为整数列，其余为字符串列"""
+        schema = pa.schema([(column, pa.int64() if column == "数量" else pa.string())
+                            for column in columns])
+        with pq.ParquetWriter(file_path, schema) as writer:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= ImportExport.PARQUET_BATCH_SIZE:
+                    ImportExport._write_parquet_batch(writer, schema, batch)
+                    batch = []
+            if batch:
+                ImportExport._write_parquet_batch(writer, schema, batch)
+    
+    @staticmethod
+    def _write_parquet_batch(writer, schema, batch):
+        arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
     
     @staticmethod
-    def import_assets(file_path, user_id):
-        """从Excel文件导入资产数据"""
+    def _numbered_history(df, columns):
+        """宽表中每行的历史记录 {行号: [记录]}
+
+        第 i 条记录在 列名i 列中（如 使用人1、使用开始时间1、使用结束时间1），第一列为空时该行的记录结束。
+        """
+        history = {}
+        active = pd.Series(True, index=df.index)
+        i = 1
+        while f"{columns[0]}{i}" in df.columns:
+            active &= df[f"{columns[0]}{i}"].notna()
+            if not active.any():
+                break
+            values = [df.loc[active, f"{name}{i}"] if f"{name}{i}" in df.columns
+                      else pd.Series(None, index=df.index[active]) for name in columns]
+            for index, *record in zip(df.index[active], *values):
+                history.setdefault(index, []).append(tuple(record))
+            i += 1
+        return history
+
+    @staticmethod
+    def _sheet_history(df, sheet, columns):
+        """分表中的历史记录按资产编号对应到资产表的行 {行号: [记录]}"""
+        key = ImportExport.SHEET_KEY_COLUMN
+        if sheet is None:
+            return {}
+        for column in (key, columns[0]):
+            if column not in sheet.columns:
+                raise ValueError(f"工作表缺少必要的列: {column}")
+        sheet = sheet[sheet[key].notna() & sheet[columns[0]].notna()]
+        by_asset_id = {}
+        values = [sheet[name] if name in sheet.columns else pd.Series(None, index=sheet.index)
+                  for name in columns]
+        # 两个表的资产编号按相同规则转为文本：数字编号所在列有空单元格时会读入为浮点数
+        for asset_id, *record in zip(ImportExport._text_column(sheet[key]), *values):
+            by_asset_id.setdefault(asset_id, []).append(tuple(record))
+        return {index: by_asset_id[asset_id]
+                for index, asset_id in zip(df.index, ImportExport._text_column(df[key]))
+                if asset_id in by_asset_id}
+
+    # 导入的资产列 -> Asset 字段
+    IMPORT_COLUMNS = {
+        "资产编号": "asset_id", "设备名称": "name", "数量": "quantity", "类目": "category",
+        "品牌规格": "brand_spec", "入库时间": "purchase_date", "设备位置": "location",
+        "备注": "notes", "维修状态": "maintenance_status",
+    }
+
+    @staticmethod
+    def _text_column(series):
+        """整列转为文本：空值为 None，整数值（读入时可能成为浮点数）不带小数点
+
+        混合类型的列中也可能有浮点数形式的整数，因此逐个值判断，而不只看列的类型。
+        """
+        series = series.map(lambda v: str(int(v)) if isinstance(v, float) and v.is_integer() else str(v),
+                            na_action="ignore")
+        return series.astype(object).where(series.notna(), None)
+
+    @staticmethod
+    def _normalize_assets(df, repairs):
+        """按列校验并转换资产表，返回 (资产字段 DataFrame, {行号: 错误信息}, 维修状态为推断值的行号)
+
+        缺少的可选列使用默认值；没有维修状态列（或值无效）时，有维修记录的资产按最后一条维修结果
+        设为 正常（含“已修复”）或 维修中，与逐条添加维修记录的结果一致，其余为 None（由写入方决定）。
+        """
+        errors = {}
+        fields = pd.DataFrame(index=df.index)
+        for column, field in ImportExport.IMPORT_COLUMNS.items():
+            if column not in df.columns:
+                fields[field] = None
+            elif field == "purchase_date":
+                values = df[column].map(_date_text, na_action="ignore")
+                fields[field] = values.astype(object).where(values.notna(), None)
+            elif field != "quantity":
+                fields[field] = ImportExport._text_column(df[column])
+
+        # 数量：空值为 1，不是数字的行报错
+        if "数量" in df.columns:
+            quantity = pd.to_numeric(df["数量"], errors="coerce")
+            for index in df.index[quantity.isna() & df["数量"].notna()]:
+                errors[index] = f"数量无效: {df.at[index, '数量']}"
+            fields["quantity"] = quantity.fillna(1).astype("int64")
+        else:
+            fields["quantity"] = 1
+
+        for field in ("name", "category", "brand_spec", "location", "notes"):
+            fields[field] = fields[field].fillna("")
+
+        # 必填列为空的行报错
+        for column, field in ImportExport.IMPORT_COLUMNS.items():
+            if field in Asset.REQUIRED_FIELDS:
+                for index in df.index[fields[field].isna() | (fields[field] == "")]:
+                    errors.setdefault(index, f"{column}不能为空")
+
+        status = fields["maintenance_status"]
+        valid = status.isin(Asset.STATUSES)
+        derived = pd.Series({index: "正常" if "已修复" in str(records[-1][2]) else "维修中"
+                             for index, records in repairs.items()}, dtype=object)
+        status = status.where(valid, derived.reindex(df.index))
+        fields["maintenance_status"] = status.astype(object).where(status.notna(), None)
+        return fields, errors, set(df.index[~valid & status.notna()])
+
+    # 合并导入时读取已有历史记录的查询，列与导入的历史记录行一致
+    USER_HISTORY_QUERY = """
+        SELECT asset_id, user_name, start_date, end_date FROM asset_users WHERE asset_id IN ({ids})"""
+    REPAIR_HISTORY_QUERY = """
+        SELECT asset_id, repair_date, fault_cause, repair_result FROM repair_records
+         WHERE asset_id IN ({ids})"""
+
+    @staticmethod
+    def _content_hash(values):
+        """历史记录的内容哈希（空值与空字符串视为相同）"""
+        text = json.dumps(["" if value is None else str(value) for value in values], ensure_ascii=False)
+        return hashlib.sha1(text.encode("utf-8")).digest()
+
+    @staticmethod
+    def _new_history(db, query, rows, asset_db_ids):
+        """去掉 rows 中数据库已有的历史记录，返回需要追加的行
+
+        asset_db_ids 为导入前已存在的资产，它们的历史记录按 LISTING_ID_BATCH 分批读取，只保留内容哈希；
+        文件中同一内容出现的次数多于数据库中的次数时，只追加多出的部分。
+        """
+        asset_db_ids = sorted(set(asset_db_ids))
+        existing = Counter()
+        for start in range(0, len(asset_db_ids), LISTING_ID_BATCH):
+            batch = asset_db_ids[start:start + LISTING_ID_BATCH]
+            existing.update(ImportExport._content_hash(row) for row in db.iterate(
+                query.format(ids=", ".join("?" * len(batch))), batch))
+        new_rows = []
+        for row in rows:
+            key = ImportExport._content_hash(row)
+            if existing[key]:
+                existing[key] -= 1
+            else:
+                new_rows.append(row)
+        return new_rows
+
+    @staticmethod
+    def _repair_rows(asset_rows, repairs):
+        """维修记录的写入行，asset_rows 为 (行号, 资产数据库ID)"""
+        return [
+            (asset_db_id, _date_text(repair_date),
+             str(fault_cause) if pd.notna(fault_cause) else "",
+             str(repair_result) if pd.notna(repair_result) else "")
+            for index, asset_db_id in asset_rows
+            for repair_date, fault_cause, repair_result in repairs.get(index, ())
+        ]
+
+    @staticmethod
+    def _keep_existing_status(db, fields, rows, records, repairs, derived):
+        """合并导入时，维修状态由文件中的维修记录推断的已有资产只有追加了新维修记录才修改状态
+
+        文件中的维修记录已在数据库中时，推断出的状态不比数据库中的新（例如资产之后已报废），
+        这些行从 records（与 rows 一一对应）中去掉 maintenance_status，保持数据库中的值。
+        """
+        derived = [index for index in rows if index in derived]
+        existing = Asset.find_ids(fields.loc[derived, "asset_id"], db)
+        asset_rows = [(index, existing[fields.at[index, "asset_id"]]) for index in derived
+                      if fields.at[index, "asset_id"] in existing]
+        if not asset_rows:
+            return
+        repaired = {row[0] for row in ImportExport._new_history(
+            db, ImportExport.REPAIR_HISTORY_QUERY, ImportExport._repair_rows(asset_rows, repairs),
+            [asset_db_id for _, asset_db_id in asset_rows])}
+        stale = {index for index, asset_db_id in asset_rows if asset_db_id not in repaired}
+        for index, record in zip(rows, records):
+            if index in stale:
+                record.pop("maintenance_status", None)
+
+    # 导入方式：insert 只添加新资产（资产编号已存在的行报错），merge 按资产编号合并
+    IMPORT_MODES = ("insert", "merge")
+
+    @staticmethod
+    def import_assets(file_path, user_id, progress=None, mode="insert"):
+        """从Excel文件导入资产数据
+        
+        支持两种布局：导出的宽表（使用人1、维修时间1……列），
+        以及分表（资产、使用记录、维修记录三个工作表，历史记录以资产编号关联）。
+        各列整列校验转换后，已存在的资产编号用一次集合查询检查，资产、使用记录和维修记录
+        分别批量写入，全部在一个事务中提交；出错的行不写入，不影响其他行。
+        mode 为 merge 时按资产编号合并（见 Asset.bulk_upsert）：已存在的资产只更新文件中有的列
+        且有变化的行，使用记录和维修记录只追加数据库中没有的（按内容哈希比较），
+        因此导出、修改后再导入只写入修改过的部分。
+        progress(已处理行数, 总行数) 用于报告进度，抛出异常时中止导入并回滚。
+        """
         try:
+            if mode not in ImportExport.IMPORT_MODES:
+                return False, f"不支持的导入方式: {mode}"
             if not os.path.exists(file_path):
                 return False, "文件不存在"
             
-            # 读取Excel文件
-            df = pd.read_excel(file_path)
+            # 读取Excel文件（所有工作表）
+            sheets = pd.read_excel(file_path, sheet_name=None)
+            if ImportExport.ASSET_SHEET in sheets:
+                df = sheets[ImportExport.ASSET_SHEET]
+            else:
+                df = next(iter(sheets.values()))
             
             # 检查必要的列是否存在
             required_columns = ["资产编号", "设备名称", "类目"]
             for col in required_columns:
                 if col not in df.columns:
                     return False, f"缺少必要的列: {col}"
+            df = df.reset_index(drop=True)
             
-            success_count = 0
-            error_count = 0
-            errors = []
+            # 每行资产的使用记录和维修记录
+            if ImportExport.ASSET_SHEET in sheets:
+                users = ImportExport._sheet_history(
+                    df, sheets.get(ImportExport.USER_SHEET), ImportExport.USER_COLUMNS)
+                repairs = ImportExport._sheet_history(
+                    df, sheets.get(ImportExport.REPAIR_SHEET), ImportExport.REPAIR_COLUMNS)
+            else:
+                users = ImportExport._numbered_history(df, ImportExport.USER_COLUMNS)
+                repairs = ImportExport._numbered_history(df, ImportExport.REPAIR_COLUMNS)
             
-            # 遍历每一行数据
-            for index, row in df.iterrows():
-                try:
-                    # 创建资产对象
-                    asset = Asset(str(row["资产编号"]))
-                    
-                    # 如果资产已存在，则跳过或更新
-                    if asset.id:
-                        error_count += 1
-                        errors.append(f"行 {index+1}: 资产编号 {row['资产编号']} 已存在")
-                        continue
-                    
-                    # 设置资产属性
-                    asset.name = str(row["设备名称"]) if pd.notna(row["设备名称"]) else ""
-                    asset.category = str(row["类目"]) if pd.notna(row["类目"]) else ""
-                    asset.quantity = int(row["数量"]) if pd.notna(row["数量"]) else 1
-                    asset.brand_spec = str(row["品牌规格"]) if pd.notna(row["品牌规格"]) else ""
-                    asset.purchase_date = str(row["入库时间"]) if pd.notna(row["入库时间"]) else None
-                    asset.location = str(row["设备位置"]) if pd.notna(row["设备位置"]) else ""
-                    asset.notes = str(row["备注"]) if pd.notna(row["备注"]) else ""
-                    
-                    # 保存资产
-                    success, msg = asset.save(user_id)
+            fields, errors, derived = ImportExport._normalize_assets(df, repairs)
+            rows = [index for index in df.index if index not in errors]
+            if mode == "merge":
+                # 合并时只写入文件中有的列，已有资产的其他字段保持不变
+                columns = [field for column, field in ImportExport.IMPORT_COLUMNS.items()
+                           if column in df.columns or field == "maintenance_status"]
+            else:
+                columns = list(fields.columns)
+            records = fields.loc[rows, columns].to_dict("records")
+            for record in records:
+                # 无法确定维修状态时新资产使用默认值，已有资产保持原状态
+                if record["maintenance_status"] is None:
+                    del record["maintenance_status"]
+            today = str(datetime.now().date())
+            
+            db = Database()
+            with db.transaction():
+                if progress:
+                    progress(0, len(df))
+                if mode == "merge":
+                    ImportExport._keep_existing_status(db, fields, rows, records, repairs, derived)
+                # 资产编号重复、已存在（只添加时）或缺少必填字段的行在这里报错
+                if mode == "merge":
+                    outcomes = Asset.bulk_upsert(records, user_id)
+                else:
+                    outcomes = Asset.bulk_insert(records, user_id)
+                saved = {}  # 行号 -> 资产编号
+                counts = Counter()  # 结果信息 -> 行数
+                existed = []  # 导入前已存在的资产编号（只有合并导入会修改已有资产）
+                for index, asset_id, (success, msg) in zip(rows, fields.loc[rows, "asset_id"], outcomes):
                     if success:
-                        success_count += 1
-                        
-                        # 处理使用人信息
-                        i = 1
-                        while f"使用人{i}" in df.columns and pd.notna(row[f"使用人{i}"]):
-                            user_name = str(row[f"使用人{i}"])
-                            start_date = str(row[f"使用开始时间{i}"]) if pd.notna(row[f"使用开始时间{i}"]) else str(datetime.now().date())
-                            end_date = str(row[f"使用结束时间{i}"]) if pd.notna(row[f"使用结束时间{i}"]) else None
-                            
-                            asset.add_user(user_name, start_date, end_date)
-                            i += 1
-                        
-                        # 处理维修记录
-                        i = 1
-                        while f"维修时间{i}" in df.columns and pd.notna(row[f"维修时间{i}"]):
-                            repair_date = str(row[f"维修时间{i}"])
-                            fault_cause = str(row[f"故障原因{i}"]) if pd.notna(row[f"故障原因{i}"]) else ""
-                            repair_result = str(row[f"维修结果{i}"]) if pd.notna(row[f"维修结果{i}"]) else ""
-                            
-                            asset.add_repair_record(repair_date, fault_cause, repair_result, user_id)
-                            i += 1
+                        saved[index] = asset_id
+                        counts[msg] += 1
+                        if mode == "merge" and msg != Asset.UPSERT_INSERTED:
+                            existed.append(asset_id)
                     else:
-                        error_count += 1
-                        errors.append(f"行 {index+1}: {msg}")
-                except Exception as e:
-                    error_count += 1
-                    errors.append(f"行 {index+1}: 处理错误 - {str(e)}")
+                        errors[index] = msg
+                asset_db_ids = Asset.find_ids(saved.values(), db)
+                if progress:
+                    progress(len(df) // 2, len(df))
+                
+                user_rows = [
+                    (asset_db_ids[asset_id], str(user_name),
+                     _date_text(start_date) if pd.notna(start_date) else today,
+                     _date_text(end_date) if pd.notna(end_date) else None)
+                    for index, asset_id in saved.items()
+                    for user_name, start_date, end_date in users.get(index, ())
+                ]
+                repair_rows = ImportExport._repair_rows(
+                    ((index, asset_db_ids[asset_id]) for index, asset_id in saved.items()), repairs)
+                if existed:
+                    existed_db_ids = [asset_db_ids[asset_id] for asset_id in existed]
+                    user_rows = ImportExport._new_history(
+                        db, ImportExport.USER_HISTORY_QUERY, user_rows, existed_db_ids)
+                    repair_rows = ImportExport._new_history(
+                        db, ImportExport.REPAIR_HISTORY_QUERY, repair_rows, existed_db_ids)
+                Asset.bulk_add_users(user_rows)
+                Asset.bulk_add_repair_records(repair_rows, user_id)
+                if progress:
+                    progress(len(df), len(df))
             
-            return True, f"导入完成。成功: {success_count}, 失败: {error_count}。\n" + "\n".join(errors[:10])
+            messages = [f"行 {index+1}: {errors[index]}" for index in sorted(errors)]
+            if mode == "merge":
+                summary = (f"导入完成。新增: {counts[Asset.UPSERT_INSERTED]}, "
+                           f"更新: {counts[Asset.UPSERT_UPDATED]}, "
+                           f"未变化: {counts[Asset.UPSERT_UNCHANGED]}, 失败: {len(errors)}。"
+                           f"追加使用记录: {len(user_rows)}, 维修记录: {len(repair_rows)}。\n")
+            else:
+                summary = f"导入完成。成功: {len(saved)}, 失败: {len(errors)}。\n"
+            return True, summary + "\n".join(messages[:10])
         except Exception as e:
             return False, f"导入失败: {str(e)}"